@@ -0,0 +1,28 @@
+import gzip
+
+try:
+    import deflate
+except ImportError:  # Optional dependency, fall back to the standard library
+    deflate = None
+
+# Every member of a gzip stream starts with this, followed by its flags
+_GZIP_MAGIC = b"\x1f\x8b\x08"
+
+
+def gunzip(data: bytes) -> bytes:
+    """
+    Decompress gzip data in a single pass.
+
+    libdeflate (through the optional ``deflate`` package) is used when it is installed.
+    It needs to know the decompressed size up front, which the gzip trailer stores modulo 2**32.
+    libdeflate only reads the first member of a stream and silently ignores the rest,
+    so it is only used if no other member header appears in the data.
+    """
+    if deflate is not None and data.find(_GZIP_MAGIC, 1) < 0:
+        size = int.from_bytes(data[-4:], "little")
+        try:
+            return deflate.gzip_decompress(data, size)
+        except deflate.DeflateError:
+            pass  # Size overflowed, let zlib deal with it
+    # zlib reads all the members, compressed data only looks like a member header by chance
+    return gzip.decompress(data)
@@ -5,15 +5,59 @@ This module provides a class for reading schematic metadata without loading
 the full schematic contents, similar to rustmatica's LitematicMetadata.
 """
 
-from dataclasses import dataclass
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from io import BytesIO, SEEK_CUR
+from operator import itemgetter
 from pathlib import Path
-from typing import Optional
+from typing import AbstractSet, BinaryIO, Mapping, Optional, Union
 
 import nbtlib
+import numpy as np
+from nbtlib.tag import BYTE, INT, USHORT, Base, Compound, Int, IntArray, read_numeric, read_string
+from numpy.typing import NDArray
 
+from .compression import gunzip
 
-@dataclass
+__all__ = ["LitematicMetadata"]
+
+# Entries read by LitematicMetadata.from_nbt, everything else (e.g. Regions) is skipped.
+# Values select entries within nested compounds, None means the whole tag is read.
+_METADATA_KEYS = dict.fromkeys((
+    "Name",
+    "Description",
+    "Author",
+    "TimeCreated",
+    "TimeModified",
+    "RegionCount",
+    "TotalVolume",
+    "TotalBlocks",
+    "EnclosingSize",
+))
+_ROOT_KEYS = {"Metadata": _METADATA_KEYS, "MinecraftDataVersion": None, "Version": None, "SubVersion": None}
+# Root entries that are read if they come before the others, but that are not waited for
+_OPTIONAL_ROOT_KEYS = frozenset(("SubVersion",))
+_SUB_VERSION_KEYS = {"SubVersion": None}
+_PREVIEW_KEYS = {"Metadata": {"PreviewImageData": None}}
+# Used when the metadata is not read from a file, the preview then can't be read again later
+_ROOT_KEYS_WITH_PREVIEW = {**_ROOT_KEYS, "Metadata": {**_METADATA_KEYS, **_PREVIEW_KEYS["Metadata"]}}
+
+_metadata_fields = itemgetter(*_METADATA_KEYS)
+_size_fields = itemgetter("x", "y", "z")
+
+# See https://minecraft.wiki/w/NBT_format
+_TAG_INT = 3
+_TAG_STRING = 8
+_TAG_LIST = 9
+_TAG_COMPOUND = 10
+_PAYLOAD_SIZES = {1: 1, 2: 2, 3: 4, 4: 8, 5: 4, 6: 8}
+_ARRAY_ITEM_SIZES = {7: 1, 11: 4, 12: 8}
+
+
+@dataclass(slots=True, frozen=True, eq=False)
 class LitematicMetadata:
     """
     Metadata for a litematica schematic.
@@ -33,8 +77,12 @@ class LitematicMetadata:
         region_count: The number of regions in this schematic
         total_volume: The total volume of all regions combined
         total_blocks: The total number of blocks all regions combined
-        enclosing_size: The size of the box enclosing all regions
-        preview_image_data: Optional raw ARGB preview image data (140x140 pixels)
+        enclosing_size: The size of the box enclosing all regions, as an (x, y, z) int32 array
+        preview_image_data: Optional raw ARGB preview image data (140x140 pixels), as C ints.
+            It is only read from the schematic the first time it is accessed.
+
+    Instances are immutable. Two metadata objects are equal if they have the same name, author,
+    creation time and Minecraft data version, the other fields are not compared.
     """
 
     name: str
@@ -48,22 +96,48 @@ class LitematicMetadata:
     region_count: int
     total_volume: int
     total_blocks: int
-    enclosing_size: tuple[int, int, int]
-    preview_image_data: Optional[list[int]]
+    enclosing_size: NDArray[np.int32]
+    # Replaced by a _LazyPreviewImageData descriptor once the class is created
+    preview_image_data: Optional[array] = field(default=None, repr=False)
+    # Either the absolute path of the file or the NBT tag to read the preview from when it is first needed,
+    # or None once preview_image_data has been loaded
+    _preview_source: Union[None, Path, IntArray] = field(default=None, init=False, repr=False)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, LitematicMetadata):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __getstate__(self) -> list:
+        # The default state of frozen slotted dataclasses would read the preview,
+        # e.g. in every worker process of scan_directory()
+        preview = type(self).preview_image_data.slot.__get__(self)
+        return [preview if f.name == "preview_image_data" else getattr(self, f.name) for f in fields(self)]
+
+    def _key(self) -> tuple:
+        return self.name, self.author, self.time_created, self.minecraft_data_version
 
     @classmethod
     def read_file(cls, filename: str | Path) -> "LitematicMetadata":
         """
         Load schematic metadata from a file.
 
+        Only the root entries needed for the metadata are parsed,
+        the content of the regions is skipped over without being decoded.
+
         Args:
             filename: Path to the .litematic file
 
         Returns:
             LitematicMetadata object containing the schematic's metadata
         """
-        nbt = nbtlib.load(str(filename), compressed=True)
-        return cls.from_nbt(nbt)
+        with open(filename, "rb") as f:
+            data = f.read()
+        # Resolved now, so that the preview is read from the right file even if the working directory changes
+        return cls._parse(data, Path(filename).resolve())
 
     @classmethod
     def from_bytes(cls, data: bytes) -> "LitematicMetadata":
@@ -76,8 +150,41 @@ class LitematicMetadata:
         Returns:
             LitematicMetadata object containing the schematic's metadata
         """
-        nbt = nbtlib.File.parse(data)
-        return cls.from_nbt(nbt)
+        return cls._parse(data, None)
+
+    @classmethod
+    def scan_directory(
+        cls, directory: str | Path, workers: Optional[int] = None, errors: Optional[dict[Path, Exception]] = None
+    ) -> dict[Path, "LitematicMetadata"]:
+        """
+        Load the metadata of all .litematic files in a directory and its subdirectories.
+
+        Files are read in parallel by a pool of worker processes.
+        On platforms that start worker processes by spawning a new interpreter (Windows and macOS),
+        the calling script must guard its entry point with ``if __name__ == "__main__":``.
+
+        Files that can't be read (e.g. corrupted ones) are left out of the result, without stopping the scan.
+
+        Args:
+            directory: Path to the directory to scan
+            workers: Number of worker processes to use, defaults to the number of CPUs
+            errors: If given, filled with the exception raised by each file that could not be read
+
+        Returns:
+            A dictionary mapping the path of each file that was read to its metadata
+        """
+        paths = sorted(Path(directory).rglob("*.litematic"))
+        workers = workers or os.cpu_count() or 1
+        chunksize = max(1, len(paths) // (workers * 4))
+        results = {}
+        with ProcessPoolExecutor(workers) as executor:
+            for file_path, result in zip(paths, executor.map(_read_file_or_error, paths, chunksize=chunksize)):
+                if isinstance(result, Exception):
+                    if errors is not None:
+                        errors[file_path] = result
+                else:
+                    results[file_path] = result
+        return results
 
     @classmethod
     def from_nbt(cls, nbt: nbtlib.File) -> "LitematicMetadata":
@@ -90,21 +197,209 @@ class LitematicMetadata:
         Returns:
             LitematicMetadata object
         """
-        meta_section = nbt["Metadata"]
-        return cls(
-            name=meta_section["Name"],
-            description=meta_section["Description"],
-            author=meta_section["Author"],
-            version=nbt["MinecraftDataVersion"],
-            sub_version=nbt.get("Version", nbt.get("MinecraftDataVersion")),
-            minecraft_data_version=nbt["MinecraftDataVersion"],
-            time_created=datetime.fromtimestamp(meta_section["TimeCreated"] / 1000),
-            time_modified=datetime.fromtimestamp(meta_section["TimeModified"] / 1000),
-            region_count=meta_section["RegionCount"],
-            total_volume=meta_section["TotalVolume"],
-            total_blocks=meta_section["TotalBlocks"],
-            enclosing_size=tuple(meta_section["EnclosingSize"]),
-            preview_image_data=list(meta_section["PreviewImageData"])
-            if "PreviewImageData" in meta_section
-            else None,
+        # nbtlib overrides Compound.__getitem__ and get() in Python to support paths,
+        # reading the entries from plain dict copies keeps every lookup in C
+        root = dict.copy(nbt)
+        meta_section = dict.copy(root["Metadata"])
+        name, description, author, created, modified, regions, volume, blocks, size = _metadata_fields(meta_section)
+        data_version = int(root["MinecraftDataVersion"])
+        # Unwrap nbtlib tags into plain Python values, so that consumers don't go through numpy
+        metadata = cls(
+            name=str(name),
+            description=str(description),
+            author=str(author),
+            version=int(root["Version"]),
+            sub_version=int(root["SubVersion"]) if "SubVersion" in root else None,
+            minecraft_data_version=data_version,
+            time_created=_from_millis(created),
+            time_modified=_from_millis(modified),
+            region_count=int(regions),
+            total_volume=int(volume),
+            total_blocks=int(blocks),
+            enclosing_size=np.array(_size_fields(dict.copy(size)), dtype=np.int32),
         )
+        # The metadata is hashable and immutable, so its array can't be modified in place either
+        metadata.enclosing_size.flags.writeable = False
+        object.__setattr__(metadata, "_preview_source", meta_section.get("PreviewImageData"))
+        return metadata
+
+    @classmethod
+    def _parse(cls, data: bytes, path: Optional[Path]) -> "LitematicMetadata":
+        """
+        Load schematic metadata from the raw content of a file.
+
+        Args:
+            data: Raw NBT data (gzip compressed)
+            path: The file the data was read from, if any. The preview is read from it again when first accessed.
+                Without a file, the preview is read now, so that the data does not have to be kept around.
+
+        Returns:
+            LitematicMetadata object containing the schematic's metadata
+        """
+        content = gunzip(data)
+        keys = _ROOT_KEYS if path is not None else _ROOT_KEYS_WITH_PREVIEW
+        fileobj = BytesIO(content)
+        nbt = _read_root(fileobj, keys, _OPTIONAL_ROOT_KEYS)
+        if "SubVersion" not in nbt:
+            sub_version = _read_trailing_int(content, "SubVersion")
+            if sub_version is not None:
+                nbt["SubVersion"] = Int(sub_version)
+            elif fileobj.tell() < len(content):
+                # Anywhere else, it can only be after the entries that were read, which are skipped over
+                nbt.update(_read_compound(fileobj, _SUB_VERSION_KEYS, stop_early=True))
+        metadata = cls.from_nbt(nbt)
+        if path is not None:
+            object.__setattr__(metadata, "_preview_source", path)
+        return metadata
+
+
+class _LazyPreviewImageData:
+    """
+    The preview_image_data field of LitematicMetadata, read from its source the first time it is accessed.
+    The loaded preview is kept in the slot the dataclass created for the field.
+    """
+
+    def __init__(self, slot) -> None:
+        self.slot = slot
+
+    def __get__(self, instance: Optional[LitematicMetadata], owner: Optional[type] = None):
+        if instance is None:
+            return self
+        if instance._preview_source is not None:
+            # The instance is frozen, the loaded preview is set behind the dataclass' back
+            self.slot.__set__(instance, _load_preview(instance._preview_source))
+            object.__setattr__(instance, "_preview_source", None)
+        return self.slot.__get__(instance, owner)
+
+    def __set__(self, instance: LitematicMetadata, value: Optional[array]) -> None:
+        self.slot.__set__(instance, value)
+
+
+LitematicMetadata.preview_image_data = _LazyPreviewImageData(LitematicMetadata.preview_image_data)
+
+
+def _read_file_or_error(filename: Path) -> Union[LitematicMetadata, Exception]:
+    """
+    Read the metadata of a file in a worker process of LitematicMetadata.scan_directory().
+    Errors are returned rather than raised, so that one bad file does not lose the results of the others.
+    """
+    try:
+        return LitematicMetadata.read_file(filename)
+    except Exception as e:
+        return e
+
+
+def _from_millis(timestamp: int) -> datetime:
+    """
+    Convert a Java timestamp in milliseconds to a datetime, using integer arithmetic only.
+    """
+    seconds, millis = divmod(int(timestamp), 1000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=millis * 1000)
+
+
+def _load_preview(source: Union[Path, IntArray]) -> Optional[array]:
+    """
+    Read the preview image data of a schematic from its file or its NBT tag.
+    """
+    if isinstance(source, Path):
+        content = gunzip(source.read_bytes())
+        source = _read_root(BytesIO(content), _PREVIEW_KEYS)["Metadata"].get("PreviewImageData")
+    if source is None:
+        return None
+    return _to_int_array(source)
+
+
+def _to_int_array(tag: nbtlib.tag.IntArray) -> array:
+    """
+    Copy an IntArray tag into a compact array of native C ints, without boxing each value.
+    """
+    values = array("i")
+    values.frombytes(tag.astype("=i4").tobytes())
+    return values
+
+
+def _read_trailing_int(content: bytes, name: str) -> Optional[int]:
+    """
+    Read an Int tag if it is the last entry of an uncompressed NBT file's root compound.
+
+    Litematica writes its SubVersion there, after the regions,
+    this finds it without skipping over everything that comes before.
+    """
+    header = bytes((_TAG_INT,)) + len(name).to_bytes(2, "big") + name.encode()
+    # The root compound's end tag is the last byte, the int payload comes right before it
+    end = len(content) - 1
+    if content[end:] != b"\x00" or content[end - 4 - len(header):end - 4] != header:
+        return None
+    return int.from_bytes(content[end - 4:end], "big", signed=True)
+
+
+def _read_root(
+    fileobj: BinaryIO, keys: Mapping[str, Optional[Mapping]], optional: AbstractSet[str] = frozenset()
+) -> nbtlib.File:
+    """
+    Parse the entries of an uncompressed NBT file's root compound that are selected by keys.
+
+    Reading stops as soon as all keys that are not optional have been found,
+    so optional keys are only read if they come before the last of the others.
+    """
+    tag_id = read_numeric(BYTE, fileobj)
+    if tag_id != _TAG_COMPOUND:
+        raise ValueError(f"Non-Compound root tags are not supported: {tag_id}")
+    root_name = read_string(fileobj)
+    entries = _read_compound(fileobj, keys, stop_early=True, optional=optional)
+    return nbtlib.File(entries, gzipped=True, root_name=root_name)
+
+
+def _read_compound(
+    fileobj: BinaryIO,
+    keys: Mapping[str, Optional[Mapping]],
+    stop_early: bool = False,
+    optional: AbstractSet[str] = frozenset(),
+) -> dict[str, Base]:
+    """
+    Parse the entries of a compound payload that are selected by keys, skipping over the others.
+
+    :param stop_early:  whether to stop as soon as all keys that are not optional have been found,
+                        leaving fileobj anywhere within the compound
+    :param optional:    keys that stop_early does not wait for
+    """
+    entries = {}
+    required = len(keys.keys() - optional)
+    while not (stop_early and len(entries.keys() - optional) == required):
+        tag_id = read_numeric(BYTE, fileobj)
+        if tag_id == 0:
+            break
+        name = read_string(fileobj)
+        if name not in keys:
+            _skip_payload(fileobj, tag_id)
+        elif keys[name] is not None and tag_id == _TAG_COMPOUND:
+            entries[name] = Compound(_read_compound(fileobj, keys[name]))
+        else:
+            entries[name] = Base.get_tag(tag_id).parse(fileobj)
+    return entries
+
+
+def _skip_payload(fileobj: BinaryIO, tag_id: int) -> None:
+    """
+    Move fileobj past the payload of a tag without decoding it.
+    """
+    if tag_id in _PAYLOAD_SIZES:
+        fileobj.seek(_PAYLOAD_SIZES[tag_id], SEEK_CUR)
+    elif tag_id in _ARRAY_ITEM_SIZES:
+        fileobj.seek(read_numeric(INT, fileobj) * _ARRAY_ITEM_SIZES[tag_id], SEEK_CUR)
+    elif tag_id == _TAG_STRING:
+        fileobj.seek(read_numeric(USHORT, fileobj), SEEK_CUR)
+    elif tag_id == _TAG_LIST:
+        item_id = read_numeric(BYTE, fileobj)
+        length = read_numeric(INT, fileobj)
+        if item_id in _PAYLOAD_SIZES:
+            fileobj.seek(length * _PAYLOAD_SIZES[item_id], SEEK_CUR)
+        else:
+            for _ in range(length):
+                _skip_payload(fileobj, item_id)
+    elif tag_id == _TAG_COMPOUND:
+        while (child_id := read_numeric(BYTE, fileobj)) != 0:
+            fileobj.seek(read_numeric(USHORT, fileobj), SEEK_CUR)
+            _skip_payload(fileobj, child_id)
+    else:
+        raise ValueError(f"Invalid NBT tag id {tag_id}")
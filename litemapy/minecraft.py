@@ -6,6 +6,7 @@ from .deprecation import deprecated_name
 from .storage import DiscriminatingDictionary
 
 from typing import Any, Optional, Union, Iterable
+from weakref import WeakValueDictionary
 
 EntityPosition = tuple[float, float, float]
 EntityRotation = tuple[float, float]
@@ -13,6 +14,9 @@ EntityMotion = tuple[float, float, float]
 
 BlockPosition = tuple[int, int, int]
 
+# Block states without tile entities, by block id and properties
+_interned_states: "WeakValueDictionary[tuple[str, frozenset[tuple[str, str]]], BlockState]" = WeakValueDictionary()
+
 
 class BlockState:
     """
@@ -20,10 +24,39 @@ class BlockState:
     :class:`BlockState` are immutable.
     """
 
+    __slots__ = ("__block_id", "__properties", "__identifier_cache", "__tile_entity", "__hash", "__weakref__")
+
     __block_id: str
     __properties: DiscriminatingDictionary
     __identifier_cache: Optional[str]
     __tile_entity: Optional["TileEntity"]
+    __hash: int
+
+    def __new__(
+        cls,
+        block_id: str,
+        tile_entity: Optional["TileEntity"] = None,
+        **properties: str,
+    ) -> "BlockState":
+        # Block states without a tile entity are immutable, so equal ones are shared.
+        # This saves memory and lets most comparisons stop at the identity check.
+        # Only plain strings are looked up, so that any other value still goes through validation below
+        key = None
+        if tile_entity is None and type(block_id) is str and all(type(v) is str for v in properties.values()):
+            key = (cls, block_id, frozenset(properties.items()))
+            state = _interned_states.get(key)
+            if state is not None:
+                return state
+        self = super().__new__(cls)
+        self.__block_id = assert_valid_identifier(block_id)
+        self.__properties = DiscriminatingDictionary(self.__validate, properties)
+        self.__identifier_cache = None
+        self.__tile_entity = tile_entity
+        # The hash can be computed once (the tile entity is not part of it)
+        self.__hash = hash((self.__block_id, frozenset(self.__properties.items())))
+        if key is not None:
+            _interned_states[key] = self
+        return self
 
     def __init__(
         self,
@@ -38,10 +71,14 @@ class BlockState:
         :param tile_entity: the tile entity associated with this block (e.g. chest inventory)
         :param properties:  the properties of the block state as keyword parameters (e.g. *facing="north"*)
         """
-        self.__block_id = assert_valid_identifier(block_id)
-        self.__properties = DiscriminatingDictionary(self.__validate, properties)
-        self.__identifier_cache = None
-        self.__tile_entity = tile_entity
+        # Everything is set up by __new__, which may return an existing instance
+
+    def __getnewargs_ex__(self) -> tuple[tuple[str, Optional["TileEntity"]], dict[str, str]]:
+        # Copies and pickles are rebuilt through __new__, so that they are shared as well
+        return (self.__block_id, self.__tile_entity), dict(self.__properties)
+
+    def __getstate__(self) -> None:
+        return None
 
     def to_nbt(self) -> Compound:
         """
@@ -103,16 +140,14 @@ class BlockState:
 
         :returns: A copy of this :class:`BlockState` with the given properties updated to new values
         """
-        none_properties = list(
-            map(lambda kv: kv[0], filter(lambda kv: kv[1] is None, properties.items()))
-        )
-        other = BlockState(self.id, tile_entity=self.tile_entity)
-        other.__properties.update(self.__properties)
-        for prop_name in none_properties:
-            other.__properties.pop(prop_name)
-            properties.pop(prop_name)
-        other.__properties.update(properties)
-        return other
+        # Build the final properties first, the new block state must not be modified after its creation
+        new_properties = dict(self.__properties)
+        for prop_name, value in properties.items():
+            if value is None:
+                new_properties.pop(prop_name)
+            else:
+                new_properties[prop_name] = value
+        return BlockState(self.id, tile_entity=self.tile_entity, **new_properties)
 
     def with_tile_entity(self, tile_entity: Optional["TileEntity"]) -> "BlockState":
         """
@@ -160,8 +195,7 @@ class BlockState:
 
         if skip_empty and self.__identifier_cache is not None:
             # The result is cached when skip_empty is True,
-            # but this function is used to implement __hash__,
-            # so we can use functools.cache
+            # which is how __repr__ calls this function
             return self.__identifier_cache
 
         # TODO Needs unit tests
@@ -179,15 +213,18 @@ class BlockState:
         return identifier
 
     def __eq__(self, other: object) -> bool:
+        if self is other:
+            return True
         if not isinstance(other, BlockState):
             return False
         return (
-            other.__block_id == self.__block_id
+            other.__hash == self.__hash
+            and other.__block_id == self.__block_id
             and other.__properties == self.__properties
         )
 
     def __hash__(self) -> int:
-        return hash(self.to_block_state_identifier())
+        return self.__hash
 
     def __repr__(self) -> str:
         return self.to_block_state_identifier(skip_empty=True)
@@ -1,13 +1,16 @@
+from collections import OrderedDict
+from io import BytesIO
+from itertools import product
 from math import ceil, log
 from time import time
 
 import copy
+import os
 
 import nbtlib
 import numpy as np
 from nbtlib.tag import (
     Short,
-    Byte,
     Int,
     Long,
     Double,
@@ -19,10 +22,12 @@ from nbtlib.tag import (
 )
 from typing_extensions import deprecated
 
-from typing import Any, Generator, Callable, Optional
+from typing import Any, Generator, Callable, Iterable, Iterator, Optional
 
+from .compression import gunzip
 from .deprecation import deprecated_name
 from .info import *
+from .metadata import LitematicMetadata
 from .minecraft import BlockState, Entity, TileEntity, RequiredKeyMissingException
 from .storage import LitematicaBitArray, DiscriminatingDictionary
 
@@ -245,19 +250,54 @@ class Schematic:
         self.modified = round(time() * 1000)
 
     @staticmethod
-    def load(file_path) -> "Schematic":
+    def load(file_path, cache: bool = False) -> "Schematic":
         """
         Read a schematic from a file.
 
         :param file_path:   the filesystem path to the file to load
+        :param cache:       whether to keep the decompressed content of the file in memory,
+                            so that loading it again skips decompression as long as the file is not modified.
+                            Each call still returns a new schematic, that can safely be modified.
+                            The least recently loaded files are dropped once the cache holds 256 MiB,
+                            and :meth:`clear_load_cache` frees it entirely.
 
         :rtype:             Schematic
 
         :raises CorruptedSchematicError: if the schematic file is malformed in any way
         """
-        nbt = nbtlib.File.load(file_path, True)
+        if cache:
+            stat = os.stat(file_path)
+            data = _read_decompressed(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+        else:
+            with open(file_path, "rb") as f:
+                data = gunzip(f.read())
+        nbt = nbtlib.File.parse(BytesIO(data))
+        nbt.filename = file_path
+        nbt.gzipped = True
         return Schematic.from_nbt(nbt)
 
+    @staticmethod
+    def clear_load_cache() -> None:
+        """
+        Free the decompressed files kept in memory by :meth:`load` with ``cache=True``.
+        """
+        global _load_cache_bytes
+        _load_cache.clear()
+        _load_cache_bytes = 0
+
+    @staticmethod
+    def peek_metadata(file_path) -> LitematicMetadata:
+        """
+        Read the metadata of a schematic file without loading its regions.
+        This is much faster than :meth:`load` when only the name, versions, sizes, etc. are needed,
+        e.g. to check whether a file uses a supported Litematica version.
+
+        :param file_path:   the filesystem path to the file to read
+
+        :rtype:             LitematicMetadata
+        """
+        return LitematicMetadata.read_file(file_path)
+
     def _can_add_region(self, name: str, region: "Region") -> tuple[bool, str]:
         if type(name) != str:
             return False, "Region name should be a string"
@@ -421,6 +461,63 @@ class Schematic:
         return rgba
 
 
+# Maximum total size of the decompressed files kept by Schematic.load(cache=True)
+_LOAD_CACHE_MAX_BYTES = 256 * 1024 * 1024
+# Decompressed files by path, with the modification time and size they were read with, least recently used first
+_load_cache: OrderedDict[str, tuple[int, int, bytes]] = OrderedDict()
+_load_cache_bytes = 0
+
+
+def _read_decompressed(path: str, mtime_ns: int, size: int) -> bytes:
+    """
+    Read and decompress a schematic file, through a cache bounded by the total size of the decompressed files.
+    The modification time and size are checked, so that modified files are read again.
+    """
+    global _load_cache_bytes
+    entry = _load_cache.get(path)
+    if entry is not None and entry[:2] == (mtime_ns, size):
+        _load_cache.move_to_end(path)
+        return entry[2]
+    with open(path, "rb") as f:
+        data = gunzip(f.read())
+    if entry is not None:
+        del _load_cache[path]
+        _load_cache_bytes -= len(entry[2])
+    if len(data) <= _LOAD_CACHE_MAX_BYTES:
+        _load_cache[path] = (mtime_ns, size, data)
+        _load_cache_bytes += len(data)
+        while _load_cache_bytes > _LOAD_CACHE_MAX_BYTES:
+            _, (_, _, evicted) = _load_cache.popitem(last=False)
+            _load_cache_bytes -= len(evicted)
+    return data
+
+
+# Number of blocks counted at once by _count_indices(), its temporary array takes 8 bytes per block
+_COUNT_CHUNK_SIZE = 1 << 20
+
+
+def _count_indices(blocks: np.ndarray, palette_size: int) -> np.ndarray:
+    """
+    Count how many blocks use each palette index.
+    np.bincount() converts its input to 64-bit integers, so it is applied to bounded chunks of the blocks.
+    """
+    counts = np.zeros(palette_size, dtype=np.int64)
+    flat = blocks.ravel()
+    for start in range(0, len(flat), _COUNT_CHUNK_SIZE):
+        counts += np.bincount(flat[start:start + _COUNT_CHUNK_SIZE], minlength=palette_size)
+    return counts
+
+
+def _index_dtype(palette_size: int) -> np.dtype:
+    """
+    The smallest unsigned integer type that can hold every index of a palette of the given size.
+    """
+    for dtype in (np.uint8, np.uint16):
+        if palette_size <= np.iinfo(dtype).max + 1:
+            return np.dtype(dtype)
+    return np.dtype(np.uint32)
+
+
 class Region:
     """
     Represents a schematic region.
@@ -433,9 +530,12 @@ class Region:
     __height: int
     __length: int
     __palette: list[BlockState]
-    __blocks: np.ndarray[
-        np.uint32, Any
-    ]  # TODO replace any with the right shape when numpy supports its
+    # Palette indices, stored with the smallest unsigned integer type that fits the palette
+    # None until the blocks are first accessed, see the __blocks property
+    __block_array: Optional[np.ndarray[
+        np.unsignedinteger, Any
+    ]]  # TODO replace any with the right shape when numpy supports its
+    __packed_blocks: Optional[LitematicaBitArray]  # Blocks read from NBT that have not been unpacked yet
     __entities: list[Entity]
     __block_ticks: list[Compound]
     __fluid_ticks: list[Compound]
@@ -459,15 +559,40 @@ class Region:
         self.__palette = [
             AIR,
         ]
-        self.__blocks = np.zeros(
-            (abs(width), abs(height), abs(length)), dtype=np.uint32
-        )
+        self.__block_array = None
+        self.__packed_blocks = None
         self.__entities = []
         self.__tile_entities = []
         self.__te_index = {}
         self.__block_ticks = []
         self.__fluid_ticks = []
 
+    @property
+    def __blocks(self) -> np.ndarray:
+        # Blocks are only allocated, or unpacked for regions read from NBT, when they are first accessed
+        if self.__block_array is None:
+            shape = (abs(self.__width), abs(self.__height), abs(self.__length))
+            if self.__packed_blocks is None:
+                self.__block_array = np.zeros(shape, dtype=np.uint8)
+            else:
+                width, height, length = shape
+                unpacked = self.__packed_blocks._get_all(_index_dtype(len(self.__palette)))
+                self.__block_array = np.ascontiguousarray(unpacked.reshape(height, length, width).transpose(2, 0, 1))
+                self.__packed_blocks = None
+        return self.__block_array
+
+    @__blocks.setter
+    def __blocks(self, blocks: np.ndarray) -> None:
+        self.__block_array = blocks
+        self.__packed_blocks = None
+
+    @property
+    def __tile_entity_index(self) -> dict[tuple[int, int, int], TileEntity]:
+        # Tile entities by store position, rebuilt if stale (e.g. after from_nbt appends)
+        if len(self.__te_index) != len(self.__tile_entities):
+            self.__te_index = {te.position: te for te in self.__tile_entities}
+        return self.__te_index
+
     def to_nbt(self) -> Compound:
         """
         Write this region to an NBT tag.
@@ -503,15 +628,8 @@ class Region:
         root["PendingFluidTicks"] = List[Compound](self.__fluid_ticks)
 
         arr = LitematicaBitArray(self.volume(), self.__get_needed_nbits())
-        for x in range(abs(self.__width)):
-            for y in range(abs(self.__height)):
-                for z in range(abs(self.__length)):
-                    ind = (
-                        (y * abs(self.__width * self.__length))
-                        + z * abs(self.__width)
-                        + x
-                    )
-                    arr[ind] = int(self.__blocks[x, y, z])
+        # Blocks are stored by x, y, z but packed with x varying fastest, then z, then y
+        arr._set_all(self.__blocks.transpose(1, 2, 0).ravel())
         root["BlockStates"] = arr._to_nbt_long_array()
 
         return root
@@ -602,17 +720,11 @@ class Region:
 
         nbt["Palette"] = palette
 
-        # process blocks
-        block_array = []
-        for i in range(abs(self.__width * self.__height * self.__length)):
-            blocks_per_layer = abs(self.__width * self.__length)
-            y = int(i / blocks_per_layer)
-            i_in_layer = i % blocks_per_layer
-            z = int(i_in_layer / abs(self.__width))
-            x = i_in_layer % abs(self.__width)
-            block_array.append(self.__blocks[x, y, z])
-
-        nbt["BlockData"] = ByteArray([Byte(id) for id in block_array])
+        # process blocks, which are ordered by Y, then Z, then X
+        if len(self.__palette) > 128:
+            raise ValueError("Sponge block data can only be written for palettes of up to 128 entries")
+        block_array = self.__blocks.transpose(1, 2, 0).ravel()
+        nbt["BlockData"] = ByteArray(block_array.astype(np.int8))
 
         return nbt
 
@@ -660,11 +772,11 @@ class Region:
             del tile_entity["Id"]
 
             tent = TileEntity.from_nbt(tile_entity)
-            tent.position = tent.data["Pos"]
+            tent.position = tuple(int(coord) for coord in tent.data["Pos"])
             del tile_entity["Pos"]
             region.tile_entities.append(tent)
 
-        # process blocks and let __setitem__() automatically generate the palette
+        # process blocks
         palette = nbt["Palette"]
         palette_dict = {}
         for block, index in palette.items():
@@ -682,13 +794,22 @@ class Region:
             block_state = BlockState(block_id, **property_dict)
             palette_dict[int(index)] = block_state
 
-        for i, index in enumerate(nbt["BlockData"]):
-            blocks_per_layer = width * length
-            y = int(i / blocks_per_layer)
-            i_in_layer = i % blocks_per_layer
-            z = int(i_in_layer / width)
-            x = i_in_layer % width
-            region[x, y, z] = palette_dict[int(index)]
+        # Map Sponge palette indices to region palette indices with a lookup table, -1 marks missing entries
+        region_indices = {}
+        for state in [AIR, *palette_dict.values()]:
+            region_indices.setdefault(state, len(region_indices))
+        table = np.full(max(palette_dict, default=-1) + 1, -1, dtype=np.int64)
+        for index, state in palette_dict.items():
+            table[index] = region_indices[state]
+        block_data = np.asarray(nbt["BlockData"], dtype=np.int64)
+        invalid = (block_data < 0) | (block_data >= len(table))
+        invalid[~invalid] = table[block_data[~invalid]] < 0
+        if invalid.any():
+            raise KeyError(int(block_data[invalid][0]))
+        region.__palette = list(region_indices)
+        # Block data is ordered by Y, then Z, then X
+        indices = table[block_data].astype(_index_dtype(len(region_indices)))
+        region.__blocks = np.ascontiguousarray(indices.reshape(height, length, width).transpose(2, 0, 1))
 
         return region, mc_version
 
@@ -792,15 +913,18 @@ class Region:
             ent.position = entity["pos"]
             region.entities.append(ent)
 
-        # process blocks and let __setitem__() automatically generate the palette
-        palette = structure["palette"]
-        for block in structure["blocks"]:
-            x, y, z = block["pos"]
-            state = block["state"]
-            region[x, y, z] = BlockState.from_nbt(palette[state])
+        # process blocks and let set_blocks() generate the palette
+        palette = [BlockState.from_nbt(state) for state in structure["palette"]]
+        blocks = structure["blocks"]
+        positions = np.array([block["pos"] for block in blocks], dtype=np.int64).reshape(-1, 3)
+        region.set_blocks(
+            positions[:, 0], positions[:, 1], positions[:, 2], [palette[block["state"]] for block in blocks]
+        )
+        for block in blocks:
             if "nbt" in block.keys():
                 tile_entity = TileEntity(block["nbt"])
-                tile_entity.position = block["pos"]
+                x, y, z = block["pos"]
+                tile_entity.position = (int(x), int(y), int(z))
                 region.tile_entities.append(tile_entity)
 
         return region, mc_version
@@ -822,13 +946,10 @@ class Region:
     def __setitem__(self, position: tuple[int, int, int], block: BlockState) -> None:
         x, y, z = self.__region_coordinates_to_store_coordinates(*position)
 
-        # Rebuild tile entity index if stale (e.g. after from_nbt appends)
-        store_pos = (x, y, z)
-        if len(self.__te_index) != len(self.__tile_entities):
-            self.__te_index = {te.position: te for te in self.__tile_entities}
-
         # Remove existing tile entity at this position
-        old_te = self.__te_index.pop(store_pos, None)
+        store_pos = (x, y, z)
+        te_index = self.__tile_entity_index
+        old_te = te_index.pop(store_pos, None)
         if old_te is not None:
             self.__tile_entities.remove(old_te)
 
@@ -837,16 +958,18 @@ class Region:
             new_te = copy.deepcopy(block.tile_entity)
             new_te.position = store_pos
             self.__tile_entities.append(new_te)
-            self.__te_index[store_pos] = new_te
+            te_index[store_pos] = new_te
 
         # Strip tile entity before palette storage to avoid leaking TE
         # to other blocks sharing the same palette entry
         palette_block = block.with_tile_entity(None) if block.tile_entity else block
-        if palette_block in self.__palette:
+        try:
             i = self.__palette.index(palette_block)
-        else:
+        except ValueError:
             self.__palette.append(palette_block)
             i = len(self.__palette) - 1
+            self.__widen_blocks()
+        # Entries that are no longer used are pruned lazily by _optimize_palette(), not on every write
         self.__blocks[x, y, z] = i
 
     @deprecated(
@@ -855,8 +978,79 @@ class Region:
     def setblock(self, x: int, y: int, z: int, block: BlockState):
         return self.__setitem__((x, y, z), block)
 
+    def set_blocks(
+        self, xs: Iterable[int], ys: Iterable[int], zs: Iterable[int], states: Iterable[BlockState]
+    ) -> None:
+        """
+        Set many blocks at once.
+        This has the same effect as ``region[x, y, z] = state`` for each position,
+        but each block state is only looked up in the palette once
+        and the blocks are written with a single NumPy operation.
+        As with individual assignments, if a position appears several times, the last state given for it is kept.
+
+        :param xs:      the X coordinates of the blocks, in this region's coordinate system
+        :param ys:      the Y coordinates of the blocks, in this region's coordinate system
+        :param zs:      the Z coordinates of the blocks, in this region's coordinate system
+        :param states:  the block state to set at each position
+
+        :raises ValueError: if the coordinates and states do not all have the same length
+        :raises IndexError: if a position is outside of this region
+        """
+        states = list(states)
+        xs, ys, zs = (np.asarray(values, dtype=np.int64).ravel() for values in (xs, ys, zs))
+        if not len(xs) == len(ys) == len(zs) == len(states):
+            raise ValueError("Coordinates and states must all have the same length")
+        if any(state.tile_entity is not None for state in states):
+            # Tile entities have to be copied and positioned one by one
+            for x, y, z, state in zip(xs.tolist(), ys.tolist(), zs.tolist(), states):
+                self[x, y, z] = state
+            return
+
+        store_coordinates = []
+        for values, size in ((xs, self.__width), (ys, self.__height), (zs, self.__length)):
+            if size < 0:
+                values = values - (size + 1)
+            if len(values) > 0 and (values.min() < 0 or values.max() >= abs(size)):
+                raise IndexError("Block position out of the region")
+            store_coordinates.append(values)
+        xs, ys, zs = store_coordinates
+
+        # NumPy does not define which value is written to a repeated position, so only the last one is kept
+        flat = np.ravel_multi_index((xs, ys, zs), self.__blocks.shape)
+        _, last = np.unique(flat[::-1], return_index=True)
+        if len(last) != len(flat):
+            keep = len(flat) - 1 - last
+            xs, ys, zs = xs[keep], ys[keep], zs[keep]
+            states = [states[n] for n in keep.tolist()]
+
+        # Remove existing tile entities at these positions
+        if self.__tile_entities:
+            te_index = self.__tile_entity_index
+            for store_pos in zip(xs.tolist(), ys.tolist(), zs.tolist()):
+                old_te = te_index.pop(store_pos, None)
+                if old_te is not None:
+                    self.__tile_entities.remove(old_te)
+
+        palette_indices = {}
+        for i, state in enumerate(self.__palette):
+            palette_indices.setdefault(state, i)
+        indices = np.empty(len(states), dtype=np.int64)
+        for n, state in enumerate(states):
+            i = palette_indices.get(state)
+            if i is None:
+                i = palette_indices[state] = len(self.__palette)
+                self.__palette.append(state)
+            indices[n] = i
+        self.__widen_blocks()
+        self.__blocks[xs, ys, zs] = indices
+
     def __contains__(self, block: BlockState) -> bool:
-        return block in self.__palette and self.__palette.index(block) in self.__blocks
+        # filter() and replace() can leave the same state at several palette indices, some of them unused
+        indices = [i for i, state in enumerate(self.__palette) if state == block]
+        if not indices:
+            return False
+        counts = _count_indices(self.__blocks, len(self.__palette))
+        return bool(counts[indices].any())
 
     def get_tile_entity(self, position: tuple[int, int, int]) -> Optional[TileEntity]:
         """
@@ -866,9 +1060,7 @@ class Region:
         :returns:           the tile entity at the given position, or None if there is none
         """
         store_pos = self.__region_coordinates_to_store_coordinates(*position)
-        if len(self.__te_index) != len(self.__tile_entities):
-            self.__te_index = {te.position: te for te in self.__tile_entities}
-        return self.__te_index.get(store_pos)
+        return self.__tile_entity_index.get(store_pos)
 
     @deprecated_name("getblockcount")
     def count_blocks(self) -> int:
@@ -922,34 +1114,19 @@ class Region:
         length = int(size["z"])
         region = Region(x, y, z, width, height, length)
         del region.__palette[0]
-        for block_nbt in nbt["BlockStatePalette"]:
-            block = BlockState.from_nbt(block_nbt)
-            region.__palette.append(block)
-
-        for entity_nbt in nbt["Entities"]:
-            entity = Entity.from_nbt(entity_nbt)
-            region.entities.append(entity)
-
-        for tile_entity_nbt in nbt["TileEntities"]:
-            block = TileEntity.from_nbt(tile_entity_nbt)
-            region.tile_entities.append(block)
+        region.__palette.extend(map(BlockState.from_nbt, nbt["BlockStatePalette"]))
+        region.entities.extend(map(Entity.from_nbt, nbt["Entities"]))
+        region.tile_entities.extend(map(TileEntity.from_nbt, nbt["TileEntities"]))
 
         blocks = nbt["BlockStates"]
         nbits = region.__get_needed_nbits()
-        bit_array = LitematicaBitArray.from_nbt_long_array(
+        # The long array is checked and copied now, but only unpacked when the blocks are first accessed
+        region.__packed_blocks = LitematicaBitArray.from_nbt_long_array(
             blocks, region.volume(), nbits
         )
-        for x in range(abs(width)):
-            for y in range(abs(height)):
-                for z in range(abs(length)):
-                    ind = (y * abs(width * length)) + z * abs(width) + x
-                    region.__blocks[x][y][z] = bit_array[ind]
-
-        for block_ticks in nbt["PendingBlockTicks"]:
-            region.__block_ticks.append(block_ticks)
 
-        for fluid_ticks in nbt["PendingFluidTicks"]:
-            region.__fluid_ticks.append(fluid_ticks)
+        region.__block_ticks.extend(nbt["PendingBlockTicks"])
+        region.__fluid_ticks.extend(nbt["PendingFluidTicks"])
 
         return region
 
@@ -1059,14 +1236,21 @@ class Region:
         return range(self.min_z(), self.max_z() + 1)
 
     @deprecated_name("allblockpos")
-    def block_positions(self) -> Generator[tuple[int, int, int], None, None]:
+    def block_positions(self) -> Iterator[tuple[int, int, int]]:
         """
         :returns:   an iterator over the coordinates this region contains in its own coordinate system
         """
-        for x in self.range_x():
-            for y in self.range_y():
-                for z in self.range_z():
-                    yield x, y, z
+        return product(self.range_x(), self.range_y(), self.range_z())
+
+    def block_positions_array(self) -> np.ndarray:
+        """
+        The coordinates this region contains, in the same order as :meth:`block_positions`.
+        The X, Y and Z columns can be passed to :meth:`set_blocks` directly.
+
+        :returns:   an integer array of shape (volume, 3), with one row of coordinates per position
+        """
+        axes = (np.arange(r.start, r.stop) for r in (self.range_x(), self.range_y(), self.range_z()))
+        return np.stack(np.meshgrid(*axes, indexing="ij"), axis=-1).reshape(-1, 3)
 
     def blocks(self) -> Generator[tuple[tuple[int, int, int], BlockState], None, None]:
         """
@@ -1074,10 +1258,25 @@ class Region:
 
         Each item will be a tuple of the local coordinates of this block, and the block state itself.
 
+        Blocks are read in the order the region stores them, one X plane at a time.
+        Changes made to the region while iterating are only reflected from the next X plane on.
+
         :returns:   an iterator yielding (position, block_state) tuples
         """
-        for pos in self.block_positions():
-            yield pos, self[pos]
+        # Store coordinates increase along with region coordinates, the innermost loop walks the contiguous Z axis.
+        # Only the current X plane is converted to Python ints, so that consumers that stop early don't pay for all
+        for store_x, x in enumerate(self.range_x()):
+            palette = list(self.__palette)
+            te_index = dict(self.__tile_entity_index)
+            plane = self.__blocks[store_x].tolist()
+            for store_y, (y, column) in enumerate(zip(self.range_y(), plane)):
+                for store_z, (z, index) in enumerate(zip(self.range_z(), column)):
+                    state = palette[index]
+                    if te_index:
+                        te = te_index.get((store_x, store_y, store_z))
+                        if te is not None:
+                            state = state.with_tile_entity(te)
+                    yield (x, y, z), state
 
     @property
     def x(self) -> int:
@@ -1200,6 +1399,19 @@ class Region:
         self._optimize_palette()
         return tuple(self.__palette)
 
+    def to_indices_array(self) -> np.ndarray:
+        """
+        Copy the palette index of every block in this region to an array.
+        The block at (x, y, z) is at ``[x - min_x(), y - min_y(), z - min_z()]``
+        and its state is the corresponding entry of :attr:`palette`.
+        Two regions with equal palettes hold the same blocks if and only if their index arrays are equal,
+        which is much faster to check than comparing every block state.
+
+        :returns:   an array of unsigned integers with shape (abs(width), abs(height), abs(length))
+        """
+        self._optimize_palette()
+        return self.__blocks.copy()
+
     def as_schematic(
         self,
         name: str = DEFAULT_NAME,
@@ -1226,29 +1438,39 @@ class Region:
     def __replace_palette_index(self, old_index: int, new_index: int) -> None:
         if old_index == new_index:
             return
+        self.__widen_blocks()
         self.__blocks[self.__blocks == old_index] = new_index
 
+    def __widen_blocks(self) -> None:
+        # Called after the palette grows, the array is only copied when it crosses a type boundary
+        if len(self.__palette) > np.iinfo(self.__blocks.dtype).max + 1:
+            self.__blocks = self.__blocks.astype(_index_dtype(len(self.__palette)))
+
     def _optimize_palette(self) -> None:
         # Functions that work directly with the palette like filter or replace
         # may introduce duplicates or unused entries in the palette.
         # For this reason, it is necessary to clean things up before exporting
         # block content in any way
+        used = _count_indices(self.__blocks, len(self.__palette)) > 0
+        used[0] = True  # Air needs to remain at index 0
         new_palette = []
+        new_indices = {}
+        remap = np.zeros(len(self.__palette), dtype=np.int64)
         for old_index, state in enumerate(self.__palette):
-            # Skip unused entries, except air that needs to remain at index 0
-            if old_index != 0 and old_index not in self.__blocks:
+            # Skip unused entries
+            if not used[old_index]:
                 continue
             # Do not copy duplicate entries multiple times
-            for i, other_state in enumerate(new_palette):
-                if state == other_state:
-                    new_index = i
-                    break
-            else:
-                # Keep that entry
-                new_index = len(new_palette)
+            new_index = new_indices.setdefault(state, len(new_palette))
+            if new_index == len(new_palette):
                 new_palette.append(state)
-            # Update blocks to reflect the new palette
-            self.__replace_palette_index(old_index, new_index)
+            remap[old_index] = new_index
+        # Update blocks to reflect the new palette in a single pass, narrowing their type if it shrank enough
+        dtype = _index_dtype(len(new_palette))
+        if len(new_palette) != len(self.__palette) or np.any(remap != np.arange(len(remap))):
+            self.__blocks = remap.astype(dtype)[self.__blocks]
+        elif self.__blocks.dtype != dtype:
+            self.__blocks = self.__blocks.astype(dtype)
         self.__palette = new_palette
 
     def filter(self, function: Callable[[BlockState], BlockState]) -> None:
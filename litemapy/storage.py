@@ -1,20 +1,26 @@
-from math import ceil
+from functools import lru_cache
+from math import ceil, gcd
 import nbtlib.tag
+import numpy as np
 from nbtlib import LongArray
 from typing import Generator, Callable, Any, Optional
 
+# Bulk packing and unpacking work on chunks of about this many values, to keep temporary arrays small
+_CHUNK_VALUES = 1 << 16
+
 
 class LitematicaBitArray:
     size: int
     nbit: int
-    array: list[int]
+    array: np.ndarray  # The packed longs as uint64, followed by an always zero padding long
     __mask: int
 
     def __init__(self, size: int, nbits: int) -> None:
         self.size = size
         self.nbits = nbits
         s = ceil(nbits * size / 64)
-        self.array = [0] * s
+        # The padding long lets values be read from two consecutive longs without bound checks
+        self.array = np.zeros(s + 1, dtype=np.uint64)
         self.__mask = (1 << nbits) - 1  # nbits bits set to 1
 
     @staticmethod
@@ -28,37 +34,104 @@ class LitematicaBitArray:
                 )
             )
         r = LitematicaBitArray(size, nbits)
-        m = (1 << 64) - 1
-        r.array = [int(i) & m for i in arr]  # Remove the infinite trailing 1s of negative numbers
+        # Reinterpret the signed longs as unsigned, which drops the sign of negative numbers
+        r.array[:-1] = np.asarray(arr, dtype=np.int64).view(np.uint64)
         return r
 
     def _to_long_list(self) -> list[int]:
-        list_of_longs = []
-        m1 = 1 << 63
-        m2 = (1 << 64) - 1
-        for i in self.array:
-            if i & m1 > 0:
-                i |= ~m2  # Add the potential infinite 1 prefix for negative numbers
-            list_of_longs.append(i)
-        return list_of_longs
+        # Reinterpret as signed longs, negative numbers get their infinite 1 prefix back
+        return self.array[:-1].view(np.int64).tolist()
 
     def _to_nbt_long_array(self) -> LongArray:
-        return nbtlib.tag.LongArray(self._to_long_list())
+        # Converting to the big endian tag is a single byte swapping copy, values are never boxed
+        return nbtlib.tag.LongArray(self.array[:-1].view(np.int64))
+
+    @staticmethod
+    @lru_cache(maxsize=8)
+    def _addressing(nbits: int) -> tuple[int, int, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Compute where each value of a chunk lies in the chunk's longs.
+        Chunks hold a whole number of longs, so that no value spans two chunks and all chunks share the same layout.
+        The tables only depend on the number of bits, so they are shared between arrays (read only),
+        and their size does not depend on the size of the arrays.
+
+        :returns:   the number of values and longs in a chunk, the index of the long each value starts in,
+                    the bit offset of each value within that long, and the indices of the first value of each long
+        """
+        # The layout repeats every time a value ends exactly at the end of a long
+        period = 64 // gcd(64, nbits)
+        chunk_values = max(1, _CHUNK_VALUES // period) * period
+        start_offsets = np.arange(chunk_values, dtype=np.int64) * nbits
+        long_indices = start_offsets >> 6
+        bit_offsets = (start_offsets & 0x3F).astype(np.uint8)
+        # Every long has at least one value starting in it, as values are at most 64 bits long
+        long_starts = np.flatnonzero(np.r_[True, long_indices[1:] != long_indices[:-1]])
+        for table in (long_indices, bit_offsets, long_starts):
+            table.setflags(write=False)
+        return chunk_values, chunk_values * nbits // 64, long_indices, bit_offsets, long_starts
+
+    def _get_all(self, dtype: np.dtype = np.uint64) -> np.ndarray:
+        """
+        Unpack all the values at once.
+        Values are unpacked chunk by chunk, so temporary arrays stay small whatever the size of the array.
+
+        :param dtype:   the type of the returned array, which must be able to hold nbits
+        :returns:       an array with the value at each index
+        """
+        chunk_values, chunk_longs, long_indices, bit_offsets, _ = self._addressing(self.nbits)
+        values = np.empty(self.size, dtype=dtype)
+        for chunk, start in enumerate(range(0, self.size, chunk_values)):
+            count = min(chunk_values, self.size - start)
+            longs = self.array[chunk * chunk_longs:]
+            indices, offsets = long_indices[:count], bit_offsets[:count]
+            low = longs[indices] >> offsets
+            # Shifting by 64 is undefined, the extra shift by 1 makes a 0 bit offset read nothing from the next long.
+            # The padding long makes the next long of the last value always valid
+            high = (longs[1:][indices] << np.uint64(1)) << (np.uint8(63) - offsets)
+            values[start:start + count] = (low | high) & np.uint64(self.__mask)
+        return values
+
+    def _set_all(self, values: np.ndarray) -> None:
+        """
+        Pack all the values at once, replacing the current content of the array.
+
+        :param values:  an array of non-negative integers, with one value for each index
+
+        :raises ValueError: if the number of values does not match the size of the array,
+                            or if one of them does not fit in nbits
+        """
+        values = np.asarray(values)
+        if len(values) != self.size:
+            raise ValueError("Expected {} values, not {}".format(self.size, len(values)))
+        if self.size == 0:
+            return
+        if values.min() < 0:
+            raise ValueError("Invalid value {}, values cannot be negative".format(values.min()))
+        if values.max() > self.__mask:
+            raise ValueError("Invalid value {}, maximum value is {}".format(values.max(), self.__mask))
+        chunk_values, chunk_longs, long_indices, bit_offsets, long_starts = self._addressing(self.nbits)
+        self.array[:] = 0
+        for chunk, start in enumerate(range(0, self.size, chunk_values)):
+            count = min(chunk_values, self.size - start)
+            # Only one chunk is converted at a time, to avoid a full size uint64 copy of the values
+            part = values[start:start + count].astype(np.uint64)
+            offsets = bit_offsets[:count]
+            low = part << offsets
+            high = (part >> np.uint64(1)) >> (np.uint8(63) - offsets)
+            # Long indices are sorted, so the values of each long can be merged with a single reduction
+            starts = long_starts[:np.searchsorted(long_starts, count)]
+            first = chunk * chunk_longs
+            self.array[first:first + len(starts)] |= np.bitwise_or.reduceat(low, starts)
+            self.array[first + 1:first + len(starts) + 1] |= np.bitwise_or.reduceat(high, starts)
 
     def __getitem__(self, index) -> int:
         if not 0 <= index < len(self):
             raise IndexError("Invalid index {}".format(index))
         start_offset = index * self.nbits
-        start_arr_index = start_offset >> 6
-        end_arr_index = ((index + 1) * self.nbits - 1) >> 6
-        start_bit_offset = start_offset & 0x3F
-
-        if start_arr_index == end_arr_index:
-            return self.array[start_arr_index] >> start_bit_offset & self.__mask
-        else:
-            end_offset = 64 - start_bit_offset
-            val = self.array[start_arr_index] >> start_bit_offset | self.array[end_arr_index] << end_offset
-            return val & self.__mask
+        arr_index = start_offset >> 6
+        # Read the value through the two longs it may span, the padding long makes the second one always valid
+        both = int(self.array[arr_index]) | int(self.array[arr_index + 1]) << 64
+        return both >> (start_offset & 0x3F) & self.__mask
 
     def __setitem__(self, index: int, value: int) -> None:
         if not 0 <= index < len(self):
@@ -66,43 +139,55 @@ class LitematicaBitArray:
         if not 0 <= value <= self.__mask:
             raise ValueError("Invalid value {}, maximum value is {}".format(value, self.__mask))
         start_offset = index * self.nbits
-        start_arr_index = start_offset >> 6
-        end_arr_index = ((index + 1) * self.nbits - 1) >> 6
+        arr_index = start_offset >> 6
         start_bit_offset = start_offset & 0x3F
-        m = (1 << 64) - 1
-        zeroed = self.array[start_arr_index] & ~(self.__mask << start_bit_offset)
-        updated = zeroed | (value & self.__mask) << start_bit_offset
-        self.array[start_arr_index] = updated & m
-
-        if start_arr_index != end_arr_index:
-            end_offset = 64 - start_bit_offset
-            j1 = self.nbits - end_offset
-            self.array[end_arr_index] = (self.array[end_arr_index] >> j1 << j1 | (
-                    value & self.__mask) >> end_offset) & m
+        both = int(self.array[arr_index]) | int(self.array[arr_index + 1]) << 64
+        both = both & ~(self.__mask << start_bit_offset) | value << start_bit_offset
+        # The second long is written back unchanged when the value does not span it
+        self.array[arr_index] = both & 0xFFFFFFFFFFFFFFFF
+        self.array[arr_index + 1] = both >> 64
 
     def __len__(self) -> int:
         return self.size
 
     def __iter__(self) -> Generator[int, None, None]:
-        for i in range(len(self)):
-            yield self[i]
+        yield from self._get_all().tolist()
 
-    def __reversed__(self) -> 'LitematicaBitArray':
-        arr = LitematicaBitArray(self.size, self.nbits)
-        for i in range(len(self)):
-            arr[i] = self[len(self) - i - 1]
-        return arr
+    def __reversed__(self) -> '_ReversedView':
+        return _ReversedView(self)
 
     def __contains__(self, value: int) -> bool:
-        for v in self:
-            if v == value:
-                return True
-        return False
+        return bool((self._get_all() == value).any())
+
+
+class _ReversedView:
+    """
+    A read only view of a :class:`LitematicaBitArray` in reverse order, which does not copy the array.
+    """
+
+    def __init__(self, array: LitematicaBitArray) -> None:
+        self.__array = array
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < len(self.__array):
+            raise IndexError("Invalid index {}".format(index))
+        return self.__array[len(self.__array) - index - 1]
+
+    def __len__(self) -> int:
+        return len(self.__array)
+
+    def __iter__(self) -> Generator[int, None, None]:
+        yield from self.__array._get_all()[::-1].tolist()
+
+    def __reversed__(self) -> LitematicaBitArray:
+        return self.__array
 
 
 ValidatorFunction = Callable[[Any, Any], tuple[bool, str]]
 ReactionFunction = Callable[[Any, Any], None]
 
+_MISSING = object()  # Sentinel for keys absent from a dictionary, which may legitimately map to None
+
 
 class DiscriminatingDictionary(dict):
     validator: ValidatorFunction
@@ -141,10 +226,10 @@ class DiscriminatingDictionary(dict):
 
     def __setitem__(self, key: Any, item: Any) -> None:
         self.validate(key, item)
-        b = key in self
-        old = self.get(key)
+        # A single lookup tells both whether the key was present and what it was mapped to
+        old = super().get(key, _MISSING)
         super().__setitem__(key, item)
-        if b:
+        if old is not _MISSING:
             self.__on_rm(key, old)
         self.__on_add(key, item)
 
@@ -5,14 +5,22 @@ This module provides structured classes for pending block and fluid ticks,
 replacing raw NBT data with type-safe representations.
 """
 
+import sys
 from dataclasses import dataclass
-from typing import TYPE_CHECKING
+from operator import itemgetter
+from typing import Iterable
 
-if TYPE_CHECKING:
-    from nbtlib.tag import Compound
+from nbtlib.tag import Compound, Int, List, String
 
+__all__ = ["PendingBlockTick", "PendingFluidTick"]
 
-@dataclass
+# Fetch all the fields of a tick from its NBT compound in one C call,
+# in the order expected by the dataclass constructors
+_block_tick_fields = itemgetter("block", "priority", "sub_tick", "time", "x", "y", "z")
+_fluid_tick_fields = itemgetter("fluid", "priority", "sub_tick", "time", "x", "y", "z")
+
+
+@dataclass(frozen=True, slots=True)
 class PendingBlockTick:
     """
     Represents a pending block tick in a region.
@@ -34,36 +42,30 @@ class PendingBlockTick:
     z: int
 
     @classmethod
-    def from_nbt(cls, nbt: "Compound") -> "PendingBlockTick":
-        """Create a PendingBlockTick from NBT data."""
-        return cls(
-            block=nbt["block"],
-            priority=nbt["priority"],
-            sub_tick=nbt["sub_tick"],
-            time=nbt["time"],
-            x=nbt["x"],
-            y=nbt["y"],
-            z=nbt["z"],
-        )
+    def from_nbt(cls, nbt: Compound) -> "PendingBlockTick":
+        """Create a PendingBlockTick from NBT data, interning the block name."""
+        block, *fields = _block_tick_fields(nbt)
+        return cls(sys.intern(str(block)), *fields)
 
-    def to_nbt(self) -> "Compound":
+    def to_nbt(self) -> Compound:
         """Convert this tick to NBT data."""
-        from nbtlib.tag import Compound
-
         return Compound(
-            {
-                "block": self.block,
-                "priority": self.priority,
-                "sub_tick": self.sub_tick,
-                "time": self.time,
-                "x": self.x,
-                "y": self.y,
-                "z": self.z,
-            }
+            block=String(self.block),
+            priority=Int(self.priority),
+            sub_tick=Int(self.sub_tick),
+            time=Int(self.time),
+            x=Int(self.x),
+            y=Int(self.y),
+            z=Int(self.z),
         )
 
+    @staticmethod
+    def list_to_nbt(ticks: Iterable["PendingBlockTick"]) -> List[Compound]:
+        """Convert many ticks to an NBT list."""
+        return List[Compound]([tick.to_nbt() for tick in ticks])
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class PendingFluidTick:
     """
     Represents a pending fluid tick in a region.
@@ -85,30 +87,24 @@ class PendingFluidTick:
     z: int
 
     @classmethod
-    def from_nbt(cls, nbt: "Compound") -> "PendingFluidTick":
-        """Create a PendingFluidTick from NBT data."""
-        return cls(
-            fluid=nbt["fluid"],
-            priority=nbt["priority"],
-            sub_tick=nbt["sub_tick"],
-            time=nbt["time"],
-            x=nbt["x"],
-            y=nbt["y"],
-            z=nbt["z"],
-        )
+    def from_nbt(cls, nbt: Compound) -> "PendingFluidTick":
+        """Create a PendingFluidTick from NBT data, interning the fluid name."""
+        fluid, *fields = _fluid_tick_fields(nbt)
+        return cls(sys.intern(str(fluid)), *fields)
 
-    def to_nbt(self) -> "Compound":
+    def to_nbt(self) -> Compound:
         """Convert this tick to NBT data."""
-        from nbtlib.tag import Compound
-
         return Compound(
-            {
-                "fluid": self.fluid,
-                "priority": self.priority,
-                "sub_tick": self.sub_tick,
-                "time": self.time,
-                "x": self.x,
-                "y": self.y,
-                "z": self.z,
-            }
+            fluid=String(self.fluid),
+            priority=Int(self.priority),
+            sub_tick=Int(self.sub_tick),
+            time=Int(self.time),
+            x=Int(self.x),
+            y=Int(self.y),
+            z=Int(self.z),
         )
+
+    @staticmethod
+    def list_to_nbt(ticks: Iterable["PendingFluidTick"]) -> List[Compound]:
+        """Convert many ticks to an NBT list."""
+        return List[Compound]([tick.to_nbt() for tick in ticks])
@@ -38,5 +38,8 @@ setuptools.setup(
         install_requires=[
                 'nbtlib>=2.0.3',
                 'typing_extensions',
-          ]
+          ],
+        extras_require={
+                'deflate': ['deflate'],  # Faster decompression with libdeflate
+          },
     )
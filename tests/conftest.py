@@ -0,0 +1,28 @@
+import pytest
+
+from litemapy import Schematic
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "slow: goes through gzip and the filesystem, deselect with '-m \"not slow\"'")
+
+
+class LoadedSchematics(dict):
+    """
+    Schematics keyed by file path, each loaded the first time it is looked up.
+    """
+
+    def __missing__(self, file_path):
+        schematic = self[file_path] = Schematic.load(file_path)
+        return schematic
+
+
+@pytest.fixture(scope="session")
+def valid_schematics():
+    """
+    Valid test litematics, loaded at most once per session and keyed by file path.
+    Tests must not modify them, use helper.roundtrip() to get a copy that can be changed.
+    Only the files a test looks up are loaded, loading every file is checked in parallel by
+    test_valid_litematics_do_not_raise_exception_when_loaded().
+    """
+    return LoadedSchematics()
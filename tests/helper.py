@@ -1,4 +1,7 @@
 import random
+from io import BytesIO
+
+import nbtlib
 from litemapy import Schematic, Region, BlockState
 
 SUB_PROC, GATEWAY = None, None
@@ -41,3 +44,14 @@ def randomschematic(regsize=20, regspread=20, regprob=0.8, blockprob=0.999):
             z = random.randint(miz, maz)
             reg[x, y, z] = s
     return sch
+
+
+def roundtrip(sch):
+    """
+    Write a schematic to NBT and read it back, without compression or touching the filesystem.
+    """
+    sch.update_metadata()
+    buffer = BytesIO()
+    nbtlib.File(sch.to_nbt()).write(buffer)
+    buffer.seek(0)
+    return Schematic.from_nbt(nbtlib.File.parse(buffer))
@@ -0,0 +1,10 @@
+import gzip
+
+from litemapy.compression import gunzip
+
+
+def test_gunzip_reads_every_member():
+    first, second = gzip.compress(b"a" * 1000), gzip.compress(b"b" * 1000)
+    assert gunzip(first) == b"a" * 1000
+    assert gunzip(first + second) == b"a" * 1000 + b"b" * 1000
+    assert gunzip(first + first) == b"a" * 2000
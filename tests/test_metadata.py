@@ -0,0 +1,159 @@
+import dataclasses
+from array import array
+from functools import lru_cache
+from os import walk
+from pathlib import Path
+
+import nbtlib
+import pytest
+
+from litemapy import LitematicMetadata, Schematic
+from constants import *
+
+valid_files = []
+for directory, child_directory, file_names in walk(VALID_LITEMATIC_DIRECTORY):
+    for file_name in file_names:
+        valid_files.append(path.join(directory, file_name))
+
+
+@lru_cache(maxsize=None)
+def load_nbt(file_path):
+    """
+    Fully parse a test litematic with nbtlib, once per file. The returned tags must not be modified.
+    """
+    return nbtlib.load(file_path)
+
+
+def assert_same_fields(metadata, expected):
+    """
+    Compare every field, equality only looks at the name, author, creation time and Minecraft data version.
+    """
+    for field in dataclasses.fields(LitematicMetadata):
+        if field.name == "enclosing_size":
+            assert metadata.enclosing_size.tolist() == expected.enclosing_size.tolist()
+        elif field.name == "preview_image_data":
+            assert metadata.preview_image_data == expected.preview_image_data
+        elif not field.name.startswith("_"):
+            assert getattr(metadata, field.name) == getattr(expected, field.name), field.name
+
+
+def test_read_file_matches_full_nbt_parsing():
+    for file_path in valid_files:
+        nbt = load_nbt(file_path)
+        expected = LitematicMetadata.from_nbt(nbt)
+        metadata = LitematicMetadata.read_file(file_path)
+        assert repr(metadata) == repr(expected)
+        size = nbt["Metadata"]["EnclosingSize"]
+        assert metadata.enclosing_size.tolist() == [size["x"], size["y"], size["z"]]
+
+
+def test_from_bytes_matches_read_file():
+    for file_path in valid_files:
+        with open(file_path, "rb") as f:
+            data = f.read()
+        assert_same_fields(LitematicMetadata.from_bytes(data), LitematicMetadata.read_file(file_path))
+
+
+def test_fields_are_plain_python_values():
+    metadata = LitematicMetadata.read_file(valid_files[0])
+    for value in (metadata.name, metadata.description, metadata.author):
+        assert type(value) is str
+    for value in (metadata.version, metadata.minecraft_data_version,
+                  metadata.region_count, metadata.total_volume, metadata.total_blocks):
+        assert type(value) is int
+    assert metadata.sub_version is None or type(metadata.sub_version) is int
+
+
+def test_versions_match_full_load():
+    for file_path in valid_files:
+        metadata = LitematicMetadata.read_file(file_path)
+        nbt = load_nbt(file_path)
+        assert metadata.version == int(nbt["Version"])
+        assert metadata.sub_version == (int(nbt["SubVersion"]) if "SubVersion" in nbt else None)
+        assert metadata.minecraft_data_version == int(nbt["MinecraftDataVersion"])
+    metadata = LitematicMetadata.read_file(path.join(VALID_LITEMATIC_DIRECTORY, "Subversion.litematic"))
+    assert (metadata.version, metadata.sub_version) == (6, 1)
+
+
+def test_sub_version_is_found_before_regions(tmp_path):
+    nbt = load_nbt(path.join(VALID_LITEMATIC_DIRECTORY, "Subversion.litematic"))
+    # After all the other entries read for the metadata, but not last
+    names = [name for name in nbt if name not in ("SubVersion", "Regions")] + ["SubVersion", "Regions"]
+    file_path = tmp_path / "reordered.litematic"
+    nbtlib.File({name: nbt[name] for name in names}, gzipped=True).save(file_path)
+    assert LitematicMetadata.read_file(file_path).sub_version == 1
+
+
+def test_schematic_peek_metadata(valid_schematics):
+    file_path = path.join(VALID_LITEMATIC_DIRECTORY, "Subversion.litematic")
+    metadata = Schematic.peek_metadata(file_path)
+    assert metadata == LitematicMetadata.read_file(file_path)
+    schematic = valid_schematics[file_path]
+    assert (metadata.name, metadata.author) == (schematic.name, schematic.author)
+    assert metadata.region_count == len(schematic.regions)
+
+
+def test_metadata_is_hashable_and_immutable():
+    first = LitematicMetadata.read_file(valid_files[0])
+    second = LitematicMetadata.read_file(valid_files[0])
+    assert first == second
+    assert len({first, second}) == 1
+    with pytest.raises(AttributeError):
+        first.name = "Renamed"
+    with pytest.raises(ValueError):
+        first.enclosing_size[0] = 0
+
+
+def test_scan_directory():
+    metadata = LitematicMetadata.scan_directory(VALID_LITEMATIC_DIRECTORY)
+    assert len(metadata) == len(valid_files)
+    for file_path in valid_files:
+        assert_same_fields(metadata[Path(file_path)], LitematicMetadata.read_file(file_path))
+
+
+def test_scan_directory_skips_unreadable_files(tmp_path):
+    valid = Path(VALID_LITEMATIC_DIRECTORY, "Subversion.litematic")
+    (tmp_path / valid.name).write_bytes(valid.read_bytes())
+    (tmp_path / "corrupted.litematic").write_bytes(b"not a litematic")
+    errors = {}
+    metadata = LitematicMetadata.scan_directory(tmp_path, errors=errors)
+    assert list(metadata) == [tmp_path / valid.name]
+    assert list(errors) == [tmp_path / "corrupted.litematic"]
+
+
+def test_preview_image_data_is_loaded_on_access():
+    for file_path in valid_files:
+        meta_section = load_nbt(file_path)["Metadata"]
+        expected = list(meta_section["PreviewImageData"]) if "PreviewImageData" in meta_section else None
+        metadata = LitematicMetadata.read_file(file_path)
+        preview = metadata.preview_image_data
+        assert (None if preview is None else list(preview)) == expected
+        assert metadata.preview_image_data is preview
+
+
+def test_preview_image_data_is_kept_by_replace_and_constructor():
+    metadata = LitematicMetadata.read_file(path.join(VALID_LITEMATIC_DIRECTORY, "Lite.litematic"))
+    renamed = dataclasses.replace(metadata, name="Renamed")
+    assert renamed.name == "Renamed"
+    assert list(renamed.preview_image_data) == list(metadata.preview_image_data)
+    rebuilt = dataclasses.replace(metadata, preview_image_data=array("i", [1, 2, 3]))
+    assert list(rebuilt.preview_image_data) == [1, 2, 3]
+
+
+def test_preview_image_data_survives_working_directory_change(monkeypatch):
+    file_path = Path(VALID_LITEMATIC_DIRECTORY, "Lite.litematic").resolve()
+    expected = list(LitematicMetadata.read_file(file_path).preview_image_data)
+    monkeypatch.chdir(file_path.parent)
+    metadata = LitematicMetadata.read_file(file_path.name)
+    monkeypatch.chdir(file_path.parent.parent)
+    assert list(metadata.preview_image_data) == expected
+
+
+def test_from_bytes_does_not_keep_the_data():
+    file_path = path.join(VALID_LITEMATIC_DIRECTORY, "Lite.litematic")
+    with open(file_path, "rb") as f:
+        data = f.read()
+    metadata = LitematicMetadata.from_bytes(data)
+    assert not isinstance(metadata._preview_source, bytes)
+    expected = LitematicMetadata.read_file(file_path).preview_image_data
+    assert list(metadata.preview_image_data) == list(expected)
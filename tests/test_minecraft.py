@@ -1,9 +1,14 @@
+import copy
+import pickle
+
 import pytest
 
 from litemapy import BlockState
 from litemapy.minecraft import is_valid_identifier
 from litemapy.minecraft import InvalidIdentifier
 from litemapy.schematic import AIR
+from litemapy.storage import DiscriminationError
+from nbtlib.tag import String
 
 
 def test_blockstate_initialization():
@@ -14,18 +19,12 @@ def test_blockstate_initialization():
         assert b[k] == v
 
 
-def test_cannot_create_blockstate_with_invalid_id():
-    ids = (
-        "",
-        "minecraft stone",
-        "stone",
-        "minecraft:stone[property=value]",
-    )
-    for id_ in ids:
-        with pytest.raises(InvalidIdentifier):
-            BlockState(id_, prop="val")
-        with pytest.raises(InvalidIdentifier):
-            AIR.with_id(id_)
+@pytest.mark.parametrize("id_", ["", "minecraft stone", "stone", "minecraft:stone[property=value]"])
+def test_cannot_create_blockstate_with_invalid_id(id_):
+    with pytest.raises(InvalidIdentifier):
+        BlockState(id_, prop="val")
+    with pytest.raises(InvalidIdentifier):
+        AIR.with_id(id_)
 
 
 def test_blockstate_nbt_is_identity():
@@ -80,3 +79,32 @@ def test_is_valid_identifier():
     assert not is_valid_identifier("minecraft:minecraft:stone")
     assert not is_valid_identifier("minecraft:oak_stairs[facing=north]")
     assert not is_valid_identifier("minecraft")
+
+
+def test_blockstate_hash_ignores_property_order():
+    state1 = BlockState("minecraft:oak_stairs", facing="north", half="top")
+    state2 = BlockState("minecraft:oak_stairs", half="top", facing="north")
+    assert state1 == state2
+    assert hash(state1) == hash(state2)
+    assert state1 != state1.with_properties(half="bottom")
+    assert hash(state1.with_properties(half=None)) == hash(BlockState("minecraft:oak_stairs", facing="north"))
+
+
+def test_blockstates_are_interned():
+    assert BlockState("minecraft:stone") is BlockState("minecraft:stone")
+    state = BlockState("minecraft:oak_stairs", facing="north")
+    assert state.with_properties(facing="south").with_properties(facing="north") is state
+    assert copy.deepcopy(state) is state
+    assert pickle.loads(pickle.dumps(state)) is state
+
+
+def test_interning_does_not_skip_validation():
+    BlockState("minecraft:stone", facing="north")
+    with pytest.raises(DiscriminationError):
+        BlockState("minecraft:stone", facing=String("north"))
+
+    class Subclass(BlockState):
+        __slots__ = ()
+
+    assert type(Subclass("minecraft:stone", facing="north")) is Subclass
+    assert type(BlockState("minecraft:stone", facing="north")) is BlockState
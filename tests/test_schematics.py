@@ -1,10 +1,14 @@
-from litemapy import Schematic, Region, BlockState
+import gzip
+import pytest
+from concurrent.futures import ProcessPoolExecutor
+from litemapy import Schematic, Region, BlockState, Entity, TileEntity, PendingBlockTick, PendingFluidTick
+from nbtlib.tag import Compound, Int, IntArray, String
 from os import walk
 from constants import *
 import helper
-from tempfile import TemporaryDirectory
+import litemapy.schematic
 import nbtlib
-import nbtlib.tag
+import numpy as np
 
 AIR = BlockState("minecraft:air")
 
@@ -14,9 +18,16 @@ for directory, child_directory, file_names in walk(VALID_LITEMATIC_DIRECTORY):
         valid_files.append(path.join(directory, file_name))
 
 
+def load_region_names(file_path):
+    # Schematics can't be pickled, so worker processes only send back something small
+    return list(Schematic.load(file_path).regions)
+
+
 def test_valid_litematics_do_not_raise_exception_when_loaded():
-    for file_path in valid_files:
-        Schematic.load(file_path)
+    # Files are independent, load them in parallel
+    with ProcessPoolExecutor() as executor:
+        region_names = list(executor.map(load_region_names, valid_files))
+    assert len(region_names) == len(valid_files)
 
 
 def test_regions_have_accurate_sizes():
@@ -110,116 +121,112 @@ def test_region_min_and_max_are_accurate():
     assert reg.max_z() == 0
 
 
-def test_are_random_schematics_preserved_when_reading_and_writing():
-    temporary_directory = TemporaryDirectory()
+@pytest.fixture(scope="module")
+def saved_random_schematics(tmp_path_factory):
+    """
+    Random schematics paired with their copy saved to and loaded back from disk, written once per module.
+    """
+    directory = tmp_path_factory.mktemp("random")
+    pairs = []
     for i in range(10):
         write_schematic = helper.randomschematic()
-        file_path = path.join(temporary_directory.name, write_schematic.name + ".litematic")
+        file_path = directory / f"{i}.litematic"
         write_schematic.save(file_path)
-        read_schematic = Schematic.load(file_path)
-
-        # Assert metadata is equals
-        assert write_schematic.name == read_schematic.name
-        assert write_schematic.author == read_schematic.author
-        assert write_schematic.description == read_schematic.description
-        assert write_schematic.width == read_schematic.width
-        assert write_schematic.height == read_schematic.height
-        assert write_schematic.length == read_schematic.length
-        assert len(write_schematic.regions) == len(read_schematic.regions)
-        for name, write_region in write_schematic.regions.items():
-            read_region = read_schematic.regions[name]
-
-            # Assert computed values are equal
-            assert write_region.min_x() == read_region.min_x()
-            assert write_region.max_x() == read_region.max_x()
-            assert write_region.min_y() == read_region.min_y()
-            assert write_region.max_y() == read_region.max_y()
-            assert write_region.min_z() == read_region.min_z()
-            assert write_region.max_z() == read_region.max_z()
-            assert write_region.min_schem_x() == read_region.min_schem_x()
-            assert write_region.max_schem_x() == read_region.max_schem_x()
-            assert write_region.min_schem_y() == read_region.min_schem_y()
-            assert write_region.max_schem_y() == read_region.max_schem_y()
-            assert write_region.min_schem_z() == read_region.min_schem_z()
-            assert write_region.max_schem_z() == read_region.max_schem_z()
-
-            # Assert all blocks are equal
-            for x, y, z in write_region.allblockpos():
-                ws = write_region[x, y, z]
-                rs = read_region[x, y, z]
-                assert ws == rs
-
-            assert_valid_palette(write_region)
-
-    temporary_directory.cleanup()
-
-
-def test_region_filter():
-    def do_filter(before_schematic, after_schematic, function):
-        print(f"Comparing litematic files {before_schematic} and {after_schematic}")
-        before_schematic = path.join(FILTER_LITEMATIC_DIRECTORY, before_schematic)
-        after_schematic = path.join(FILTER_LITEMATIC_DIRECTORY, after_schematic)
-        before_schematic = Schematic.load(before_schematic)
-        after_schematic = Schematic.load(after_schematic)
-        assert len(before_schematic.regions) == 1, "Invalid test litematic"
-        assert len(after_schematic.regions) == 1, "Invalid test litematic"
-        (before_schematic,) = before_schematic.regions.values()
-        (after_schematic,) = after_schematic.regions.values()
-        assert before_schematic.width == after_schematic.width, "Invalid test litematic"
-        assert before_schematic.height == after_schematic.height, "Invalid test litematic"
-        assert before_schematic.length == after_schematic.length, "Invalid test litematic"
-        before_schematic.filter(function)
-        for x in before_schematic.range_x():
-            for y in before_schematic.range_y():
-                for z in before_schematic.range_z():
-                    state_1 = before_schematic[x, y, z]
-                    state_2 = after_schematic[x, y, z]
-                    assert state_1 == state_2
-        assert_valid_palette(before_schematic)
-
-    def all_blue_filter(b: BlockState):
-        return BlockState("minecraft:light_blue_concrete")
-
-    do_filter('rainbow-line.litematic', 'blue-line.litematic', all_blue_filter)
-
-    red = BlockState("minecraft:red_concrete")
-    blue = BlockState("minecraft:blue_concrete")
-
-    def black_red_white_blue(b: BlockState):
-        if b.id == "minecraft:black_concrete":
-            return red
-        if b.id == "minecraft:white_concrete":
-            return blue
-        return b
-
-    do_filter('black-white.litematic', 'red-blue.litematic', black_red_white_blue)
-
-    def glassify(state: BlockState):
-        if "water" in state.id:
-            return BlockState("minecraft:blue_stained_glass")
-        elif state.id == "minecraft:sand":
-            return BlockState('minecraft:yellow_stained_glass')
-        elif state.id == "minecraft:dirt":
-            return BlockState("minecraft:brown_stained_glass")
-        elif state.id == "minecraft:stone":
-            return BlockState("minecraft:light_gray_stained_glass")
-        elif state.id in ("minecraft:grass_block", "minecraft:birch_leaves"):
-            return BlockState("minecraft:green_stained_glass")
-        elif state.id == "minecraft:birch_log":
-            return BlockState("minecraft:white_stained_glass")
-        elif state.id == "minecraft:copper_ore":
-            return BlockState("minecraft:orange_stained_glass")
-        elif state.id == "minecraft:grass":
-            return BlockState("minecraft:green_stained_glass_pane", east="true", north="true", south="true",
-                              west="true", waterlogged="false")
-        return state
-
-    do_filter('tree.litematic', 'tree-glass.litematic', glassify)
-
-    def wool_to_concrete(b: BlockState):
-        return b.with_id(b.id.replace('wool', 'concrete'))
-
-    do_filter('concrete-wool.litematic', 'concrete-full.litematic', wool_to_concrete)
+        pairs.append((write_schematic, Schematic.load(file_path)))
+    return pairs
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("index", range(10))
+def test_are_random_schematics_preserved_when_reading_and_writing(saved_random_schematics, index):
+    write_schematic, read_schematic = saved_random_schematics[index]
+
+    # Assert metadata is equals
+    assert write_schematic.name == read_schematic.name
+    assert write_schematic.author == read_schematic.author
+    assert write_schematic.description == read_schematic.description
+    assert write_schematic.width == read_schematic.width
+    assert write_schematic.height == read_schematic.height
+    assert write_schematic.length == read_schematic.length
+    assert len(write_schematic.regions) == len(read_schematic.regions)
+    for name, write_region in write_schematic.regions.items():
+        read_region = read_schematic.regions[name]
+
+        # Assert computed values are equal
+        assert region_bounds(write_region) == region_bounds(read_region)
+
+        # Assert all blocks are equal
+        assert write_region.palette == read_region.palette
+        assert np.array_equal(write_region.to_indices_array(), read_region.to_indices_array())
+
+        assert_valid_palette(write_region)
+
+
+def all_blue_filter(b: BlockState):
+    return BlockState("minecraft:light_blue_concrete")
+
+
+def black_red_white_blue(b: BlockState):
+    if b.id == "minecraft:black_concrete":
+        return BlockState("minecraft:red_concrete")
+    if b.id == "minecraft:white_concrete":
+        return BlockState("minecraft:blue_concrete")
+    return b
+
+
+def glassify(state: BlockState):
+    if "water" in state.id:
+        return BlockState("minecraft:blue_stained_glass")
+    elif state.id == "minecraft:sand":
+        return BlockState('minecraft:yellow_stained_glass')
+    elif state.id == "minecraft:dirt":
+        return BlockState("minecraft:brown_stained_glass")
+    elif state.id == "minecraft:stone":
+        return BlockState("minecraft:light_gray_stained_glass")
+    elif state.id in ("minecraft:grass_block", "minecraft:birch_leaves"):
+        return BlockState("minecraft:green_stained_glass")
+    elif state.id == "minecraft:birch_log":
+        return BlockState("minecraft:white_stained_glass")
+    elif state.id == "minecraft:copper_ore":
+        return BlockState("minecraft:orange_stained_glass")
+    elif state.id == "minecraft:grass":
+        return BlockState("minecraft:green_stained_glass_pane", east="true", north="true", south="true",
+                          west="true", waterlogged="false")
+    return state
+
+
+def wool_to_concrete(b: BlockState):
+    return b.with_id(b.id.replace('wool', 'concrete'))
+
+
+@pytest.mark.parametrize("before_schematic,after_schematic,function", [
+    ('rainbow-line.litematic', 'blue-line.litematic', all_blue_filter),
+    ('black-white.litematic', 'red-blue.litematic', black_red_white_blue),
+    ('tree.litematic', 'tree-glass.litematic', glassify),
+    ('concrete-wool.litematic', 'concrete-full.litematic', wool_to_concrete),
+])
+def test_region_filter(before_schematic, after_schematic, function):
+    before_schematic = Schematic.load(path.join(FILTER_LITEMATIC_DIRECTORY, before_schematic))
+    after_schematic = Schematic.load(path.join(FILTER_LITEMATIC_DIRECTORY, after_schematic))
+    assert len(before_schematic.regions) == 1, "Invalid test litematic"
+    assert len(after_schematic.regions) == 1, "Invalid test litematic"
+    (before_schematic,) = before_schematic.regions.values()
+    (after_schematic,) = after_schematic.regions.values()
+    assert before_schematic.width == after_schematic.width, "Invalid test litematic"
+    assert before_schematic.height == after_schematic.height, "Invalid test litematic"
+    assert before_schematic.length == after_schematic.length, "Invalid test litematic"
+    before_schematic.filter(function)
+    assert list(before_schematic.blocks()) == list(after_schematic.blocks())
+    assert_valid_palette(before_schematic)
+
+
+def region_bounds(region: Region):
+    return [
+        region.min_x(), region.max_x(), region.min_y(), region.max_y(), region.min_z(), region.max_z(),
+        region.min_schem_x(), region.max_schem_x(),
+        region.min_schem_y(), region.max_schem_y(),
+        region.min_schem_z(), region.max_schem_z(),
+    ]
 
 
 def assert_valid_palette(region: Region):
@@ -240,7 +247,7 @@ def assert_valid_palette(region: Region):
 
 
 def test_unused_palette_entries_get_pruned():
-    region = Region(0, 0, 0, 10, 10, 10)
+    region = Region(0, 0, 0, 1, 1, 1)
     region[0, 0, 0] = BlockState("minecraft:stone")
     region[0, 0, 0] = AIR
     assert_valid_palette(region)
@@ -254,7 +261,7 @@ def test_region_getitem_setitem():
 
 
 def test_region_in():
-    region = Region(0, 0, 0, 10, 10, 10)
+    region = Region(0, 0, 0, 1, 1, 1)
     stone = BlockState("minecraft:stone")
     assert stone not in region
     region[0, 0, 0] = stone
@@ -263,8 +270,21 @@ def test_region_in():
     assert stone not in region
 
 
+def test_region_in_with_duplicate_palette_entries():
+    region = Region(0, 0, 0, 2, 1, 1)
+    stone = BlockState("minecraft:stone")
+    dirt = BlockState("minecraft:dirt")
+    region[0, 0, 0] = stone
+    region[1, 0, 0] = dirt
+    region[0, 0, 0] = AIR
+    # The palette now holds stone twice, only the second entry is used
+    region.replace(dirt, stone)
+    assert stone in region
+    assert dirt not in region
+
+
 def test_replace():
-    region = Region(0, 0, 0, 10, 10, 10)
+    region = Region(0, 0, 0, 3, 1, 1)
     stone = BlockState("minecraft:stone")
     log = BlockState("minecraft:oak_log")
     grass = BlockState("minecraft:grass_block")
@@ -278,18 +298,17 @@ def test_replace():
     assert region[2, 0, 0] == stone
 
 
-def test_subversion():
-    schematic = Schematic.load(path.join(VALID_LITEMATIC_DIRECTORY, "Subversion.litematic"))
+def test_subversion(valid_schematics):
+    schematic = valid_schematics[path.join(VALID_LITEMATIC_DIRECTORY, "Subversion.litematic")]
     assert schematic.lm_subversion == 1
-    with TemporaryDirectory() as temp:
-        schematic.lm_subversion = 1337
-        name = path.join(temp, "Subversion.litematic")
-        schematic.save(name)
-        schematic = Schematic.load(name)
+    schematic = helper.roundtrip(schematic)
+    schematic.lm_subversion = 1337
+    schematic = helper.roundtrip(schematic)
     assert schematic.lm_subversion == 1337
 
 
-def test_v6_and_v7_support():
+@pytest.mark.parametrize("lm_version", [6, 7])
+def test_v6_and_v7_support(lm_version):
     """Test that both Litematica v6 and v7 formats are supported."""
     # Create a test region with some blocks
     reg = Region(0, 0, 0, 5, 5, 5)
@@ -297,58 +316,30 @@ def test_v6_and_v7_support():
     reg[1, 1, 1] = BlockState("minecraft:oak_planks")
     reg[2, 2, 2] = BlockState("minecraft:glass")
 
-    with TemporaryDirectory() as temp:
-        # Test v6
-        schem_v6 = Schematic(
-            name="Test v6",
-            author="Test",
-            description="Testing v6",
-            regions={"main": reg},
-            lm_version=6
-        )
-        assert schem_v6.lm_version == 6
-
-        v6_path = path.join(temp, "test_v6.litematic")
-        schem_v6.save(v6_path)
-
-        # Load v6 schematic
-        loaded_v6 = Schematic.load(v6_path)
-        assert loaded_v6.lm_version == 6
-        assert loaded_v6.name == "Test v6"
-        assert "main" in loaded_v6.regions
-        loaded_reg_v6 = loaded_v6.regions["main"]
-        assert loaded_reg_v6[0, 0, 0] == BlockState("minecraft:stone")
-        assert loaded_reg_v6[1, 1, 1] == BlockState("minecraft:oak_planks")
-        assert loaded_reg_v6[2, 2, 2] == BlockState("minecraft:glass")
-
-        # Test v7
-        schem_v7 = Schematic(
-            name="Test v7",
-            author="Test",
-            description="Testing v7",
-            regions={"main": reg},
-            lm_version=7
-        )
-        assert schem_v7.lm_version == 7
-
-        v7_path = path.join(temp, "test_v7.litematic")
-        schem_v7.save(v7_path)
-
-        # Load v7 schematic
-        loaded_v7 = Schematic.load(v7_path)
-        assert loaded_v7.lm_version == 7
-        assert loaded_v7.name == "Test v7"
-        assert "main" in loaded_v7.regions
-        loaded_reg_v7 = loaded_v7.regions["main"]
-        assert loaded_reg_v7[0, 0, 0] == BlockState("minecraft:stone")
-        assert loaded_reg_v7[1, 1, 1] == BlockState("minecraft:oak_planks")
-        assert loaded_reg_v7[2, 2, 2] == BlockState("minecraft:glass")
+    schem = Schematic(
+        name=f"Test v{lm_version}",
+        author="Test",
+        description=f"Testing v{lm_version}",
+        regions={"main": reg},
+        lm_version=lm_version
+    )
+    assert schem.lm_version == lm_version
+
+    loaded = helper.roundtrip(schem)
+    assert loaded.lm_version == lm_version
+    assert loaded.name == f"Test v{lm_version}"
+    assert "main" in loaded.regions
+    loaded_reg = loaded.regions["main"]
+    assert [loaded_reg[i, i, i] for i in range(3)] == [
+        BlockState("minecraft:stone"),
+        BlockState("minecraft:oak_planks"),
+        BlockState("minecraft:glass"),
+    ]
 
 
 def test_unsupported_version_raises_error():
     """Test that unsupported Litematica versions raise an error."""
     from litemapy.schematic import CorruptedSchematicError
-    from nbtlib.tag import Compound, Int
 
     # Create a mock NBT with unsupported version
     nbt = Compound()
@@ -382,3 +373,200 @@ def test_unsupported_version_raises_error():
     except CorruptedSchematicError as e:
         assert "Unsupported Litematica version" in str(e)
         assert "4" in str(e)
+
+
+def test_all_region_collections_persist():
+    reg = Region(0, 0, 0, 3, 3, 3)
+    zombie = Entity("minecraft:zombie")
+    zombie.position = (0.5, 1.0, 1.5)
+    reg.entities.append(zombie)
+    reg[1, 1, 1] = BlockState("minecraft:chest").with_tile_entity(TileEntity(Compound({"id": String("minecraft:chest")})))
+    block_tick = PendingBlockTick("minecraft:repeater", 0, 1, 2, 1, 0, 1)
+    fluid_tick = PendingFluidTick("minecraft:water", 0, 1, 5, 2, 0, 2)
+    reg.block_ticks.append(block_tick.to_nbt())
+    reg.fluid_ticks.append(fluid_tick.to_nbt())
+
+    # Round-trip once and check every collection
+    loaded = helper.roundtrip(Schematic(name="collections", regions={"main": reg})).regions["main"]
+    assert [(e.id, e.position) for e in loaded.entities] == [("minecraft:zombie", (0.5, 1.0, 1.5))]
+    assert [(te.data["id"], te.position) for te in loaded.tile_entities] == [("minecraft:chest", (1, 1, 1))]
+    assert [PendingBlockTick.from_nbt(tick) for tick in loaded.block_ticks] == [block_tick]
+    assert [PendingFluidTick.from_nbt(tick) for tick in loaded.fluid_ticks] == [fluid_tick]
+
+
+def test_set_blocks_matches_setitem():
+    stone = BlockState("minecraft:stone")
+    glass = BlockState("minecraft:glass")
+    for size in ((4, 3, 2), (-4, -3, -2)):
+        expected = Region(0, 0, 0, *size)
+        region = Region(0, 0, 0, *size)
+        positions = list(expected.block_positions())[::3]
+        states = [stone if i % 2 else glass for i in range(len(positions))]
+        for position, state in zip(positions, states):
+            expected[position] = state
+        xs, ys, zs = zip(*positions)
+        region.set_blocks(xs, ys, zs, states)
+        assert [region[p] for p in region.block_positions()] == [expected[p] for p in expected.block_positions()]
+        assert_valid_palette(region)
+
+    region = Region(0, 0, 0, 2, 2, 2)
+    chest = BlockState("minecraft:chest").with_tile_entity(TileEntity(Compound({"id": String("minecraft:chest")})))
+    region.set_blocks([1], [1], [1], [chest])
+    assert region[1, 1, 1].tile_entity.position == (1, 1, 1)
+    region.set_blocks([1, 0], [1, 0], [1, 0], [stone, stone])
+    assert region.tile_entities == []
+    with pytest.raises(IndexError):
+        region.set_blocks([2], [0], [0], [stone])
+    with pytest.raises(ValueError):
+        region.set_blocks([0, 1], [0], [0], [stone])
+
+
+def test_set_blocks_keeps_the_last_state_of_repeated_positions():
+    stone = BlockState("minecraft:stone")
+    glass = BlockState("minecraft:glass")
+    region = Region(0, 0, 0, 4, 4, 4)
+    count = 10000
+    states = [stone] * (count - 1) + [glass]
+    region.set_blocks([1] * count, [2] * count, [3] * count, states)
+    assert region[1, 2, 3] == glass
+    region.set_blocks([0, 1, 0], [0, 2, 0], [0, 3, 0], [glass, stone, stone])
+    assert (region[0, 0, 0], region[1, 2, 3]) == (stone, stone)
+
+
+def test_blocks_matches_getitem():
+    chest = BlockState("minecraft:chest").with_tile_entity(TileEntity(Compound({"id": String("minecraft:chest")})))
+    for size in ((3, 2, 4), (-3, -2, -4)):
+        region = Region(0, 0, 0, *size)
+        positions = list(region.block_positions())
+        for i, position in enumerate(positions[::2]):
+            region[position] = BlockState("minecraft:stone" if i % 2 else "minecraft:glass")
+        region[positions[1]] = chest
+        blocks = list(region.blocks())
+        assert blocks == [(p, region[p]) for p in positions]
+        assert blocks[1][1].tile_entity.position == region[positions[1]].tile_entity.position
+
+
+@pytest.fixture
+def empty_load_cache():
+    """
+    Start and leave the module-wide cache of Schematic.load(cache=True) empty, so that tests don't depend on each other.
+    """
+    Schematic.clear_load_cache()
+    yield
+    Schematic.clear_load_cache()
+
+
+def test_load_reads_multi_member_gzip_files(tmp_path, empty_load_cache):
+    file_path = tmp_path / "members.litematic"
+    region = Region(0, 0, 0, 2, 2, 2)
+    region[1, 1, 1] = BlockState("minecraft:stone")
+    Schematic(name="members", regions={"main": region}).save(file_path)
+    content = gzip.decompress(file_path.read_bytes())
+    middle = len(content) // 2
+    file_path.write_bytes(gzip.compress(content[:middle]) + gzip.compress(content[middle:]))
+    for cache in (False, True):
+        assert Schematic.load(file_path, cache=cache).regions["main"][1, 1, 1] == BlockState("minecraft:stone")
+
+
+def test_load_cache_returns_independent_schematics(tmp_path, empty_load_cache):
+    file_path = tmp_path / "cached.litematic"
+    region = Region(0, 0, 0, 2, 2, 2)
+    region[0, 0, 0] = BlockState("minecraft:stone")
+    Schematic(name="cached", regions={"main": region}).save(file_path)
+
+    first = Schematic.load(file_path, cache=True)
+    first.regions["main"][0, 0, 0] = BlockState("minecraft:dirt")
+    second = Schematic.load(file_path, cache=True)
+    assert second.regions["main"][0, 0, 0] == BlockState("minecraft:stone")
+
+    # Modifying the file invalidates the cached content
+    region[0, 0, 0] = BlockState("minecraft:glass")
+    Schematic(name="cached", author="someone else", regions={"main": region}).save(file_path)
+    reloaded = Schematic.load(file_path, cache=True)
+    assert reloaded.author == "someone else"
+    assert reloaded.regions["main"][0, 0, 0] == BlockState("minecraft:glass")
+
+
+def test_load_cache_is_bounded_and_can_be_cleared(tmp_path, monkeypatch, empty_load_cache):
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / "cached{}.litematic".format(i))
+        Schematic(name="cached{}".format(i), regions={"main": Region(0, 0, 0, 2, 2, 2)}).save(paths[-1])
+    size = len(litemapy.schematic.gunzip(paths[0].read_bytes()))
+    monkeypatch.setattr(litemapy.schematic, "_LOAD_CACHE_MAX_BYTES", 2 * size)
+    for file_path in paths:
+        Schematic.load(file_path, cache=True)
+    # Only the two most recently loaded files fit in the cache
+    assert list(litemapy.schematic._load_cache) == [path.abspath(p) for p in paths[1:]]
+    Schematic.clear_load_cache()
+    assert not litemapy.schematic._load_cache
+
+
+def test_loaded_blocks_are_unpacked_on_first_access():
+    region = Region(0, 0, 0, -3, 2, 4)
+    region[-2, 1, 3] = BlockState("minecraft:stone")
+    loaded = helper.roundtrip(Schematic(name="lazy", regions={"main": region})).regions["main"]
+    assert loaded._Region__block_array is None
+    assert loaded.min_x() == region.min_x() and loaded.volume() == region.volume()
+    assert loaded[-2, 1, 3] == BlockState("minecraft:stone")
+    assert loaded._Region__block_array is not None
+    assert list(loaded.blocks()) == list(region.blocks())
+
+
+def test_sponge_round_trip():
+    region = Region(0, 0, 0, 3, 2, 4)
+    region[1, 0, 2] = BlockState("minecraft:stone")
+    region[2, 1, 3] = BlockState("minecraft:oak_stairs", facing="east", half="top")
+    nbt = region.to_sponge_nbt()
+    assert list(nbt["BlockData"]) == [region.palette.index(state) for _, state in sorted(
+        region.blocks(), key=lambda block: (block[0][1], block[0][2], block[0][0]))]
+
+    nbt["BlockEntities"].append(Compound({"Id": String("minecraft:chest"), "Pos": IntArray([2, 1, 3])}))
+    loaded, _ = Region.from_sponge_nbt(nbt)
+    assert list(loaded.blocks())[:-1] == list(region.blocks())[:-1]
+    assert loaded[2, 1, 3].tile_entity.position == (2, 1, 3)
+    assert_valid_palette(loaded)
+
+
+def test_palette_growth_past_256_entries():
+    region = Region(0, 0, 0, 20, 1, 20)
+    assert region._Region__blocks.dtype == np.uint8
+    states = [BlockState("minecraft:stone" if i % 2 else "minecraft:glass", level=str(i)) for i in range(300)]
+    positions = list(region.block_positions())
+    for position, state in zip(positions[:150], states[:150]):
+        region[position] = state
+    xs, ys, zs = zip(*positions[150:300])
+    region.set_blocks(xs, ys, zs, states[150:])
+    assert region._Region__blocks.dtype == np.uint16
+    assert [region[p] for p in positions[:300]] == states
+    loaded = helper.roundtrip(Schematic(name="wide", regions={"main": region})).regions["main"]
+    assert list(loaded.blocks()) == list(region.blocks())
+
+    region.replace(BlockState("minecraft:air"), BlockState("minecraft:dirt"))
+    assert region[positions[-1]] == BlockState("minecraft:dirt")
+    region.filter(lambda state: BlockState("minecraft:stone"))
+    assert len(region.palette) == 2
+    assert region._Region__blocks.dtype == np.uint8
+    assert_valid_palette(region)
+
+
+def test_block_positions_array():
+    for size in ((3, 2, 4), (-3, 2, -4)):
+        region = Region(0, 0, 0, *size)
+        positions = region.block_positions_array()
+        assert positions.shape == (region.volume(), 3)
+        assert [tuple(p) for p in positions.tolist()] == list(region.block_positions())
+        region.set_blocks(*positions.T, [BlockState("minecraft:stone")] * region.volume())
+        assert region.palette == (BlockState("minecraft:air"), BlockState("minecraft:stone"))
+
+
+def test_to_indices_array():
+    region = Region(0, 0, 0, -3, 2, 4)
+    stone = BlockState("minecraft:stone")
+    region[-2, 1, 3] = stone
+    indices = region.to_indices_array()
+    assert indices.shape == (3, 2, 4)
+    assert region.palette[indices[-2 - region.min_x(), 1, 3]] == stone
+    assert int(indices.sum()) == region.palette.index(stone)
+    indices[0, 0, 0] = 1
+    assert region[region.min_x(), 0, 0] == BlockState("minecraft:air")
@@ -1,6 +1,7 @@
 import pytest
 import litemapy.storage as storage
 import math
+import numpy as np
 
 TEST_VALUES = 0, 0, 0, 12, 13, 0, 4, 0, 2, 4, 1, 3, 3, 7, 65, 9
 
@@ -147,3 +148,70 @@ def test_discriminating_dictionary_onadd_onremove():
     dictionary.update({"x": 100, "d": 500, "y": 200})
     assert c.added == 807
     assert c.removed == 17
+
+
+def test_discriminating_dictionary_replaces_none_values():
+    removed = []
+    dictionary = storage.DiscriminatingDictionary(
+        lambda k, v: (True, ""),
+        onremove=lambda k, v: removed.append((k, v)),
+        a=None
+    )
+    dictionary["b"] = None
+    assert removed == []
+    dictionary["a"] = 1
+    assert removed == [("a", None)]
+
+
+def test_litematica_bit_array_bulk_access_matches_indexing():
+    for nbits in (2, 5, 13, 32):
+        values = [(i * 7919) % (1 << nbits) for i in range(200)]
+        indexed = storage.LitematicaBitArray(len(values), nbits)
+        for i, e in enumerate(values):
+            indexed[i] = e
+        bulk = storage.LitematicaBitArray(len(values), nbits)
+        bulk._set_all(values)
+        assert bulk._to_long_list() == indexed._to_long_list()
+        assert bulk._get_all().tolist() == values
+        assert list(indexed) == values
+        assert indexed._to_nbt_long_array().tolist() == indexed._to_long_list()
+        loaded = storage.LitematicaBitArray.from_nbt_long_array(indexed._to_nbt_long_array(), len(values), nbits)
+        assert list(loaded) == values
+    with pytest.raises(ValueError):
+        storage.LitematicaBitArray(3, 2)._set_all([0, 1, 4])
+
+
+def test_litematica_bit_array_addressing_is_shared():
+    first = storage.LitematicaBitArray(100, 5)
+    second = storage.LitematicaBitArray(10 ** 6, 5)
+    assert first._addressing(5) is second._addressing(5)
+    chunk_values, chunk_longs, *tables = first._addressing(5)
+    assert chunk_values * 5 == chunk_longs * 64
+    assert all(not table.flags.writeable for table in tables)
+    assert tables[1].dtype == np.uint8
+
+
+def test_litematica_bit_array_bulk_access_across_chunks():
+    for nbits in (3, 5, 16, 64):
+        size = 3 * storage._CHUNK_VALUES + 7
+        values = (np.arange(size, dtype=np.uint64) * np.uint64(2654435761)) & np.uint64((1 << nbits) - 1)
+        bulk = storage.LitematicaBitArray(size, nbits)
+        bulk._set_all(values)
+        assert np.array_equal(bulk._get_all(), values)
+        for index in (0, storage._CHUNK_VALUES - 1, storage._CHUNK_VALUES, size - 1):
+            assert bulk[index] == int(values[index])
+
+
+def test_litematica_bit_array_reversed():
+    nbits = math.ceil(math.log(max(TEST_VALUES), 2)) + 1
+    array = storage.LitematicaBitArray(len(TEST_VALUES), nbits)
+    for i, e in enumerate(TEST_VALUES):
+        array[i] = e
+    reverse = reversed(array)
+    assert len(reverse) == len(TEST_VALUES)
+    assert list(reverse) == list(reversed(TEST_VALUES))
+    assert [reverse[i] for i in range(len(reverse))] == list(reversed(TEST_VALUES))
+    with pytest.raises(IndexError):
+        reverse[len(TEST_VALUES)]
+    array[0] = 1
+    assert reverse[len(TEST_VALUES) - 1] == 1
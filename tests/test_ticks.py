@@ -0,0 +1,37 @@
+from litemapy import PendingBlockTick, PendingFluidTick
+
+
+def test_block_ticks_list_to_nbt():
+    ticks = [
+        PendingBlockTick("minecraft:repeater", 0, 1, 2, 3, 4, 5),
+        PendingBlockTick("minecraft:observer", -1, 6, 7, 8, 9, 10),
+    ]
+    nbt = PendingBlockTick.list_to_nbt(ticks)
+    assert list(nbt) == [tick.to_nbt() for tick in ticks]
+    assert [PendingBlockTick.from_nbt(tag) for tag in nbt] == ticks
+
+
+def test_fluid_ticks_list_to_nbt():
+    ticks = [
+        PendingFluidTick("minecraft:water", 0, 1, 2, 3, 4, 5),
+        PendingFluidTick("minecraft:lava", 1, 6, 7, 8, 9, 10),
+    ]
+    nbt = PendingFluidTick.list_to_nbt(ticks)
+    assert list(nbt) == [tick.to_nbt() for tick in ticks]
+    assert [PendingFluidTick.from_nbt(tag) for tag in nbt] == ticks
+
+
+def test_ticks_are_hashable():
+    tick = PendingBlockTick("minecraft:repeater", 0, 1, 2, 3, 4, 5)
+    same = PendingBlockTick("minecraft:repeater", 0, 1, 2, 3, 4, 5)
+    other = PendingBlockTick("minecraft:repeater", 0, 1, 2, 3, 4, 6)
+    assert len({tick, same, other}) == 2
+    fluid = PendingFluidTick("minecraft:water", 0, 1, 2, 3, 4, 5)
+    assert fluid in {PendingFluidTick("minecraft:water", 0, 1, 2, 3, 4, 5)}
+
+
+def test_tick_names_are_interned():
+    first = PendingFluidTick("minecraft:water", 0, 1, 2, 3, 4, 5).to_nbt()
+    second = PendingFluidTick("minecraft:water", 1, 6, 7, 8, 9, 10).to_nbt()
+    assert PendingFluidTick.from_nbt(first).fluid is PendingFluidTick.from_nbt(second).fluid
+    assert type(PendingFluidTick.from_nbt(first).fluid) is str
@@ -1,30 +1,21 @@
-from tempfile import TemporaryDirectory
-from os import path
-
 from litemapy import Schematic, Region, BlockState, TileEntity
 from nbtlib.tag import Compound, String, List, Byte
+import helper
+
+
+def container_nbt(block_id, item_id, count):
+    """
+    Build the NBT of a container holding a single stack of items in its first slot.
+    """
+    item = Compound({"Slot": Byte(0), "id": String(item_id), "Count": Byte(count)})
+    return Compound({"id": String(block_id), "Items": List[Compound]([item])})
 
 
 def test_tile_entity_copy_on_assignment():
-    reg_a = Region(0, 0, 0, 5, 5, 5)
+    reg_a = Region(0, 0, 0, 2, 2, 2)
     pos_a = (1, 1, 1)
 
-    te_nbt = Compound(
-        {
-            "id": String("minecraft:hopper"),
-            "Items": List[Compound](
-                [
-                    Compound(
-                        {
-                            "Slot": Byte(0),
-                            "id": String("minecraft:diamond"),
-                            "Count": Byte(1),
-                        }
-                    )
-                ]
-            ),
-        }
-    )
+    te_nbt = container_nbt("minecraft:hopper", "minecraft:diamond", 1)
     te = TileEntity(te_nbt)
 
     hopper = BlockState("minecraft:hopper").with_tile_entity(te)
@@ -35,7 +26,7 @@ def test_tile_entity_copy_on_assignment():
     assert retrieved_a.tile_entity is not None
     assert retrieved_a.tile_entity.data["Items"][0]["id"] == "minecraft:diamond"
 
-    reg_b = Region(0, 0, 0, 10, 10, 10)
+    reg_b = Region(0, 0, 0, 6, 6, 6)
     pos_b = (5, 5, 5)
 
     reg_b[pos_b] = reg_a[pos_a]
@@ -53,7 +44,7 @@ def test_tile_entity_copy_on_assignment():
 
 
 def test_tile_entity_removal_on_overwrite():
-    reg = Region(0, 0, 0, 3, 3, 3)
+    reg = Region(0, 0, 0, 2, 2, 2)
     pos = (1, 1, 1)
 
     te = TileEntity(Compound({"id": String("minecraft:hopper")}))
@@ -67,48 +58,14 @@ def test_tile_entity_removal_on_overwrite():
 
 
 def test_tile_entity_overwrite_with_another_tile_entity():
-    reg = Region(0, 0, 0, 3, 3, 3)
+    reg = Region(0, 0, 0, 2, 2, 2)
     pos = (1, 1, 1)
 
-    te_diamond = TileEntity(
-        Compound(
-            {
-                "id": String("minecraft:chest"),
-                "Items": List[Compound](
-                    [
-                        Compound(
-                            {
-                                "Slot": Byte(0),
-                                "id": String("minecraft:diamond"),
-                                "Count": Byte(1),
-                            }
-                        )
-                    ]
-                ),
-            }
-        )
-    )
+    te_diamond = TileEntity(container_nbt("minecraft:chest", "minecraft:diamond", 1))
     reg[pos] = BlockState("minecraft:chest").with_tile_entity(te_diamond)
     assert reg[pos].tile_entity.data["Items"][0]["id"] == "minecraft:diamond"
 
-    te_emerald = TileEntity(
-        Compound(
-            {
-                "id": String("minecraft:chest"),
-                "Items": List[Compound](
-                    [
-                        Compound(
-                            {
-                                "Slot": Byte(0),
-                                "id": String("minecraft:emerald"),
-                                "Count": Byte(1),
-                            }
-                        )
-                    ]
-                ),
-            }
-        )
-    )
+    te_emerald = TileEntity(container_nbt("minecraft:chest", "minecraft:emerald", 1))
     reg[pos] = BlockState("minecraft:chest").with_tile_entity(te_emerald)
 
     # Old tile entity should be replaced, not accumulated
@@ -117,30 +74,13 @@ def test_tile_entity_overwrite_with_another_tile_entity():
 
 
 def test_get_tile_entity_returns_none_for_empty_position():
-    reg = Region(0, 0, 0, 3, 3, 3)
+    reg = Region(0, 0, 0, 1, 1, 1)
     assert reg.get_tile_entity((0, 0, 0)) is None
     assert reg[0, 0, 0].tile_entity is None
 
 
 def test_with_id_preserves_tile_entity():
-    te = TileEntity(
-        Compound(
-            {
-                "id": String("minecraft:chest"),
-                "Items": List[Compound](
-                    [
-                        Compound(
-                            {
-                                "Slot": Byte(0),
-                                "id": String("minecraft:diamond"),
-                                "Count": Byte(1),
-                            }
-                        )
-                    ]
-                ),
-            }
-        )
-    )
+    te = TileEntity(container_nbt("minecraft:chest", "minecraft:diamond", 1))
     chest = BlockState("minecraft:chest").with_tile_entity(te)
     barrel = chest.with_id("minecraft:barrel")
     assert barrel.id == "minecraft:barrel"
@@ -157,46 +97,12 @@ def test_with_properties_preserves_tile_entity():
 
 
 def test_litematic_round_trip_preserves_tile_entities():
-    reg = Region(0, 0, 0, 5, 5, 5)
-
-    te_1 = TileEntity(
-        Compound(
-            {
-                "id": String("minecraft:chest"),
-                "Items": List[Compound](
-                    [
-                        Compound(
-                            {
-                                "Slot": Byte(0),
-                                "id": String("minecraft:diamond"),
-                                "Count": Byte(64),
-                            }
-                        )
-                    ]
-                ),
-            }
-        )
-    )
+    reg = Region(0, 0, 0, 4, 3, 2)
+
+    te_1 = TileEntity(container_nbt("minecraft:chest", "minecraft:diamond", 64))
     reg[1, 1, 1] = BlockState("minecraft:chest").with_tile_entity(te_1)
 
-    te_2 = TileEntity(
-        Compound(
-            {
-                "id": String("minecraft:chest"),
-                "Items": List[Compound](
-                    [
-                        Compound(
-                            {
-                                "Slot": Byte(0),
-                                "id": String("minecraft:emerald"),
-                                "Count": Byte(16),
-                            }
-                        )
-                    ]
-                ),
-            }
-        )
-    )
+    te_2 = TileEntity(container_nbt("minecraft:chest", "minecraft:emerald", 16))
     reg[3, 2, 1] = BlockState("minecraft:chest").with_tile_entity(te_2)
 
     reg[0, 0, 0] = BlockState("minecraft:stone")
@@ -205,24 +111,17 @@ def test_litematic_round_trip_preserves_tile_entities():
         name="te_test", author="test", description="test", regions={"main": reg}
     )
 
-    with TemporaryDirectory() as tmp:
-        file_path = path.join(tmp, "te_test.litematic")
-        schem.save(file_path)
-        loaded = Schematic.load(file_path)
+    loaded = helper.roundtrip(schem)
 
     loaded_reg = loaded.regions["main"]
     assert len(loaded_reg.tile_entities) == 2
 
-    b1 = loaded_reg[1, 1, 1]
-    assert b1.id == "minecraft:chest"
-    assert b1.tile_entity is not None
-    assert b1.tile_entity.data["Items"][0]["id"] == "minecraft:diamond"
-    assert int(b1.tile_entity.data["Items"][0]["Count"]) == 64
-
-    b2 = loaded_reg[3, 2, 1]
-    assert b2.id == "minecraft:chest"
-    assert b2.tile_entity is not None
-    assert b2.tile_entity.data["Items"][0]["id"] == "minecraft:emerald"
+    chests = [loaded_reg[1, 1, 1], loaded_reg[3, 2, 1]]
+    assert [b.id for b in chests] == ["minecraft:chest", "minecraft:chest"]
+    assert all(b.tile_entity is not None for b in chests)
+    items = [b.tile_entity.data["Items"][0] for b in chests]
+    assert [item["id"] for item in items] == ["minecraft:diamond", "minecraft:emerald"]
+    assert [int(item["Count"]) for item in items] == [64, 16]
 
     # Blocks without tile entities should not be affected
     assert loaded_reg[0, 0, 0].tile_entity is None
@@ -232,24 +131,9 @@ def test_litematic_round_trip_preserves_tile_entities():
 def test_palette_does_not_leak_tile_entity():
     # A TE-bearing block stored first should not leak its TE
     # to other blocks of the same type that have no TE
-    reg = Region(0, 0, 0, 5, 5, 5)
-
-    te_nbt = Compound(
-        {
-            "id": String("minecraft:chest"),
-            "Items": List[Compound](
-                [
-                    Compound(
-                        {
-                            "Slot": Byte(0),
-                            "id": String("minecraft:diamond"),
-                            "Count": Byte(64),
-                        }
-                    )
-                ]
-            ),
-        }
-    )
+    reg = Region(0, 0, 0, 2, 2, 2)
+
+    te_nbt = container_nbt("minecraft:chest", "minecraft:diamond", 64)
     te = TileEntity(te_nbt)
     chest_with_te = BlockState("minecraft:chest").with_tile_entity(te)
     chest_without_te = BlockState("minecraft:chest")